@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+analytics.py
+
+Dashboard counters over all saved results: totals by disease, risk level, age
+category, gender and day. They live in analytics.json and are updated by
+save_result as each record is written, so /api/admin/stats answers from the
+counters instead of reading every user's results.
+
+Like user_index.json, the file is stamped with the results.json version it
+reflects; if results.json is changed by something else it is rebuilt on next
+use in one streaming pass over results.json (one record in memory at a time).
+
+Usage:
+    python analytics.py rebuild   # recompute analytics.json from results.json
+    python analytics.py show      # print the current counters
+"""
+import json
+import sys
+import time
+
+from age_specific_recommendations import get_age_category
+from storage import ANALYTICS_FILE, DerivedIndex, lock, on_user_deleted, record_time
+
+DIMENSIONS = ("disease", "risk", "age_category", "gender", "day")
+
+
+def _age_category(age):
+    try:
+        return get_age_category(int(float(age)))
+    except (TypeError, ValueError):
+        return "unknown"
+
+
+def _keys(record):
+    """The counter key for each dimension of one saved result."""
+    when = record_time(record)
+    return {
+        "disease": (record.get("disease") or "").strip() or "Unknown",
+        "risk": (record.get("risk") or "").strip().title() or "Unknown",
+        "age_category": _age_category(record.get("patient_age")),
+        "gender": (record.get("patient_gender") or "").strip().title() or "Unknown",
+        "day": when.date().isoformat() if when else "unknown",
+    }
+
+
+def _apply(counters, record, delta=1):
+    counters["total"] += delta
+    for dim, key in _keys(record).items():
+        bucket = counters[dim]
+        n = bucket.get(key, 0) + delta
+        if n:
+            bucket[key] = n
+        else:
+            bucket.pop(key, None)
+
+
+def build(records):
+    """Counters from (email, record) pairs in one pass."""
+    counters = {"total": 0, **{dim: {} for dim in DIMENSIONS}}
+    for _email, record in records:
+        _apply(counters, record)
+    return counters
+
+
+_index = DerivedIndex(ANALYTICS_FILE, build)
+load = _index.load
+
+
+def record_saved(counters, record):
+    """Count a record that was just saved to results.json (with storage.lock
+    held; `counters` from load() before the save)."""
+    _index.apply(counters, lambda counters: _apply(counters, record))
+
+
+@on_user_deleted
+def _user_deleted(email, removed, store, results_before):
+    def subtract(counters):
+        for record in removed:
+            _apply(counters, record, -1)
+    _index.update(subtract, results_before, store)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    cmd = argv[0] if argv else "show"
+    if cmd == "rebuild":
+        started = time.perf_counter()
+        with lock:
+            counters = _index.rebuild()
+            _index.save(counters, stamp_results=False)
+        print(f"Counted {counters['total']} results in {time.perf_counter() - started:.2f}s -> {ANALYTICS_FILE}")
+    elif cmd == "show":
+        counters = load()
+        print(json.dumps({k: v for k, v in counters.items() if k != "results_stamp"}, indent=2, ensure_ascii=False))
+    else:
+        print(__doc__)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
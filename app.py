@@ -1,14 +1,49 @@
 # app.py
-from flask import Flask, send_from_directory, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Flask, Response, send_file, request, jsonify, stream_with_context
 from datetime import datetime, timedelta
+from functools import lru_cache
 from email.message import EmailMessage
-import smtplib, ssl, random, os, json, threading, socket, traceback
-from PyPDF2 import PdfReader
-from age_specific_recommendations import get_age_specific_recommendations, get_age_category, get_realtime_thinking_for_babies
-
-
-app = Flask(__name__, static_url_path='', static_folder='.')
+import smtplib, ssl, random, os, json, threading, traceback, atexit, hmac, tempfile, importlib
+from age_specific_recommendations import get_age_profile, get_profile_recommendations, get_cached_thinking, build_thinking_table
+import knowledge_base
+import user_index
+import analytics
+import results_pdf
+import export_results
+import responses
+import metrics
+from metrics import stage
+import profiler
+from static_assets import assets as static_assets
+from jobs import JobRunner
+from mail_queue import MailQueue
+from smtp_pool import SMTPPool
+from otp_store import create_otp_store
+from password_hasher import hasher, HasherBusy
+from session_tokens import issue_token, verify_token
+from report_parser import parse_lab_text, extract_and_classify, mismatch_warning
+from storage import (
+    lock, _read_json,
+    get_users, save_users, get_results_store, save_results_store, delete_user, on_user_deleted, file_stamp,
+)
+
+
+# Static files are served by static_assets (index.html + static/ only)
+app = Flask(__name__, static_folder=None)
+responses.init_app(app)   # orjson encoding + gzip/brotli for every response
+metrics.init_app(app)   # per-route latency/in-flight, exported at /metrics
+profiler.init_app(app)   # admin-started sampling profiler (/api/admin/profile/*)
+
+# Debug switches come from the environment (never on by default):
+#   APP_DEBUG=1       Flask debug mode (debugger + reloader with `python app.py`)
+#   DEBUG_SHOW_OTP=1  include the OTP in /api/send-otp responses (local testing only)
+# APP_WARM_UP=0 makes create_app skip warm_up() (fastest cold start; heavy
+# modules and data then load on the first request that needs them).
+app.config.update(
+    DEBUG=os.environ.get("APP_DEBUG", "0") == "1",
+    DEBUG_SHOW_OTP=os.environ.get("DEBUG_SHOW_OTP", "0") == "1",
+    WARM_UP=os.environ.get("APP_WARM_UP", "1") == "1",
+)
 
 # ===================== SMTP SETTINGS (EDIT) =====================
 SMTP_HOST = os.environ.get("SMTP_HOST", "smtp.gmail.com")
@@ -17,37 +52,46 @@ SMTP_EMAIL = os.environ.get("SMTP_EMAIL", "d900327@gmail.com")   # sender/login
 SMTP_APP_PASSWORD = os.environ.get("SMTP_APP_PASSWORD", "qggh nmrn dbyb uqod")
 SENDER_NAME = os.environ.get("SENDER_NAME", "MedPredict")
 SMTP_DEBUG = int(os.environ.get("SMTP_DEBUG", "0"))   # set 1 to print SMTP debug logs to console
+SMTP_SECURITY = os.environ.get("SMTP_SECURITY", "tls").lower()   # tls (SSL:465 fallback) | ssl | none (local test server)
 # ================================================================
 
-USERS_FILE   = "users.json"
-RESULTS_FILE = "results.json"
-
-OTP_STORE = {}  # email -> {"otp": "123456", "expires": dt, "last_sent": dt, "verified": False}
+OTP_STORE = create_otp_store()  # email -> OTPEntry(otp, expires, last_sent, verified); OTP_BACKEND=memory|sqlite
 OTP_EXP_MINUTES = 10
 OTP_RATE_LIMIT_SECONDS = 60
 
-lock = threading.Lock()
-
-# ---------------- JSON tiny DB ----------------
-def _read_json(path, default):
-    if not os.path.exists(path):
-        return default
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return default
-
-def _write_json(path, data):
-    tmp = path + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    os.replace(tmp, path)
-
-def get_users(): return _read_json(USERS_FILE, {})
-def save_users(x): _write_json(USERS_FILE, x)
-def get_results_store(): return _read_json(RESULTS_FILE, {})
-def save_results_store(x): _write_json(RESULTS_FILE, x)
+def _dedupe_patient_ids(email, rows):
+    """Give each record whose patient ID number repeats an earlier record's a
+    new unused ID (in place). Returns True if any record was changed."""
+    first_letter = email[0].lower() if email else "p"
+    assigned_ids = set()
+    next_id = 101
+    
+    # First pass: collect already assigned valid IDs
+    for record in rows:
+        num_str = ''.join(filter(str.isdigit, record.get("patient_id") or ""))
+        if num_str:
+            id_num = int(num_str)
+            assigned_ids.add(id_num)
+            next_id = max(next_id, id_num + 1)
+    
+    # Second pass: reassign duplicate IDs
+    seen_ids = set()
+    changed = False
+    for record in rows:
+        num_str = ''.join(filter(str.isdigit, record.get("patient_id") or ""))
+        if not num_str:
+            continue
+        id_num = int(num_str)
+        if id_num in seen_ids:
+            while next_id in assigned_ids:
+                next_id += 1
+            record["patient_id"] = f"{first_letter}{next_id}"
+            assigned_ids.add(next_id)
+            next_id += 1
+            changed = True
+        else:
+            seen_ids.add(id_num)
+    return changed
 
 # Generate Patient ID from timestamp (backend version)
 def generate_patient_id_backend(record, user_email=""):
@@ -90,32 +134,52 @@ def generate_patient_id_backend(record, user_email=""):
 
 
 # Simple dataset-based prediction support (k-NN over JSON dataset)
+_dataset_cache = (None, None)   # (file_stamp, records)
+
 def _load_dataset(path="dataset.json"):
-    return _read_json(path, [])
+    """dataset.json records, re-read only when the file changes (read-only; shared across requests)."""
+    global _dataset_cache
+    with stage("dataset_load"):
+        stamp = file_stamp(path)
+        cached_stamp, ds = _dataset_cache
+        if ds is None or stamp != cached_stamp:
+            ds = _read_json(path, [])
+            _dataset_cache = (stamp, ds)
+        return ds
 
 # ML model artifacts (populated by `train_model.py`)
 MODEL_FILE = os.path.join(os.path.dirname(__file__), 'model.joblib')
 VOCAB_FILE  = os.path.join(os.path.dirname(__file__), 'vocab.json')
 
-_MODEL = None
-_VOCAB = None
-try:
-    if os.path.exists(MODEL_FILE) and os.path.exists(VOCAB_FILE):
-        from joblib import load as joblib_load
-        _MODEL = joblib_load(MODEL_FILE)
-        with open(VOCAB_FILE, 'r', encoding='utf-8') as _f:
-            _VOCAB = json.load(_f)
-        print(f"Loaded ML model from {MODEL_FILE} with {len(_VOCAB)} features")
-    else:
-        print("No ML model found (model.joblib). Using dataset k-NN fallback.")
-except Exception as e:
-    print("Failed to load ML model:", e)
-    _MODEL = None
-    _VOCAB = None
+_model = None   # (model, vocab), or (None, None) without a trained model
+_model_lock = threading.Lock()
+
+def load_model():
+    """The trained model and its feature vocabulary, loaded on first call so
+    joblib/scikit-learn are only imported when a model is actually used."""
+    global _model
+    with _model_lock:
+        if _model is not None:
+            return _model
+        model = vocab = None
+        try:
+            if os.path.exists(MODEL_FILE) and os.path.exists(VOCAB_FILE):
+                from joblib import load as joblib_load
+                model = joblib_load(MODEL_FILE)
+                with open(VOCAB_FILE, 'r', encoding='utf-8') as _f:
+                    vocab = json.load(_f)
+                print(f"Loaded ML model from {MODEL_FILE} with {len(vocab)} features")
+            else:
+                print("No ML model found (model.joblib). Using dataset k-NN fallback.")
+        except Exception as e:
+            print("Failed to load ML model:", e)
+            model = vocab = None
+        _model = (model, vocab)
+        return _model
 
-    # Minimal disease recommendations mapping used by `age_adjusted_recommendations`.
-    # Populate with domain-specific guidance as needed. Kept empty to avoid runtime errors.
-    DISEASE_RECOMMENDATIONS = {}
+# Minimal disease recommendations mapping used by `age_adjusted_recommendations`.
+# Populate with domain-specific guidance as needed. Kept empty to avoid runtime errors.
+DISEASE_RECOMMENDATIONS = {}
 
 def convert_months_to_years(age, months):
     """Convert age=0 with months to fractional age in years.
@@ -132,164 +196,156 @@ def convert_months_to_years(age, months):
         return None
 
 
-def age_adjusted_recommendations(disease, age, symptoms, months=None):
-    """Return ONLY ESSENTIAL recommendations for disease adjusted by age and specific symptoms.
-    If age is 0, months parameter will be used to compute age in years (e.g., 6 months -> 0.5).
-    """
-    try:
-        age_num = convert_months_to_years(age, months)
-    except Exception:
-        age_num = None
-
-    age_cat = get_age_category(age_num)
-    
-    # Normalize symptoms
-    norm_symptoms = [s.lower().strip().replace(' ', '_') for s in (symptoms or []) if s]
-    
-    # Collect recommendations for each symptom
-    all_recs = []
+# Age-band wording for the generic parts of age_adjusted_recommendations.
+# Bands follow the original thresholds: <5, <=12, 13-18, >=65, everything else.
+# The None band (age unknown) only has the generic advice line.
+AGE_BAND_RECOMMENDATIONS = {
+    'infant': {
+        'advice': "Advice: Infants need immediate pediatrician consultation. Monitor hydration and vital signs closely.",
+        'medicines': "Medicines: Consult pediatrician for specific medicines. Avoid over-the-counter medications.",
+        'rest': "Rest: 16-20 hours sleep. Keep environment calm and cool.",
+        'emergency': "EMERGENCY: If temperature >39°C, difficulty breathing, or no wet diapers >8 hours - SEEK IMMEDIATE CARE",
+        'follow_up': "Follow-up: If not improving in 24 hours, contact pediatrician immediately.",
+    },
+    'child': {
+        'advice': "Advice: Monitor symptoms, ensure adequate rest and hydration.",
+        'medicines': "Medicines: Paracetamol syrup as recommended by pediatrician.",
+        'rest': "Rest: 10-12 hours sleep daily. Minimize physical activity.",
+        'emergency': "EMERGENCY: If fever >104°F, severe breathing difficulty, or confusion - SEEK IMMEDIATE CARE",
+        'follow_up': "Follow-up: Contact doctor if symptoms persist >3 days.",
+    },
+    'teen': {
+        'advice': "Advice: Get complete bed rest and stay well hydrated. Most symptoms improve in 3-5 days.",
+        'medicines': "Medicines: Crocin 500mg or Dolo 500mg as needed for fever/pain.",
+        'rest': "Rest: 8-10 hours sleep. Avoid gym and sports.",
+        'emergency': "EMERGENCY: If fever >104°F, chest pain, or confusion - SEEK IMMEDIATE CARE",
+        'follow_up': "Follow-up: Contact doctor if symptoms persist >5 days.",
+    },
+    'elderly': {
+        'advice': "Advice: Elderly patients should seek medical attention early to prevent complications.",
+        'medicines': "Medicines: Consult doctor. Avoid NSAIDs. Use paracetamol only.",
+        'rest': "Rest: 7-9 hours sleep. Monitor blood pressure. Prevent falls.",
+        'emergency': "EMERGENCY: If fever >103°F, chest pain, breathing difficulty, or confusion - SEEK IMMEDIATE CARE",
+        'follow_up': "Follow-up: Contact doctor immediately if any worsening. Follow-up within 3 days.",
+    },
+    'adult': {
+        'advice': "Advice: Rest well and stay hydrated. Seek medical care if worsening or persisting.",
+        'medicines': "Medicines: Crocin 650mg or Dolo 500mg as needed.",
+        'rest': "Rest: 8 hours sleep minimum. Light walking only when better.",
+        'emergency': "EMERGENCY: If fever >104°F, severe symptoms, or chest pain - SEEK IMMEDIATE CARE",
+        'follow_up': "Follow-up: Contact doctor if symptoms persist >5-7 days.",
+    },
+    None: {
+        'advice': "Advice: Rest, hydration, and proper nutrition are important for recovery.",
+    },
+}
+DEFAULT_TIMING_RECOMMENDATION = "Timing: Every 6 hours with food. Do not exceed daily limits."
+DEFAULT_DIET_RECOMMENDATION = "Diet: Light warm foods like rice, dal, soup. Avoid spicy and oily foods."
+DEFAULT_DRINKS_RECOMMENDATION = "Drinks: Warm water, herbal tea, coconut water. Drink frequently (3-4 liters/day)."
+
+# Bound on memoized (symptoms, profile) combinations kept by _recommendations_for
+RECOMMENDATION_CACHE_SIZE = 4096
+
+
+def _age_band(age_num):
+    """Band key into AGE_BAND_RECOMMENDATIONS for a (possibly fractional) age."""
+    if age_num is None:
+        return None
+    if age_num < 5:
+        return 'infant'
+    elif age_num <= 12:
+        return 'child'
+    elif 13 <= age_num <= 18:
+        return 'teen'
+    elif age_num >= 65:
+        return 'elderly'
+    return 'adult'
+
+
+@lru_cache(maxsize=RECOMMENDATION_CACHE_SIZE)
+def _recommendations_for(symptoms, profile, band, kb):
+    """Assemble the recommendation lines for a symptom tuple and age profile.
+    Memoized: the result depends only on these arguments (kb is the immutable
+    knowledge base version), so it is returned as a tuple and callers copy it."""
+    age_cat = profile[0]
     collected_medicines = []
     collected_diet = []
     collected_drinks = []
     primary_advice = None
     medicine_timing_info = None
-    
-    if norm_symptoms:
-        for symptom in norm_symptoms:
-            age_specific = get_age_specific_recommendations(symptom, age_num)
-            if age_specific:
-                # Collect primary advice from first symptom
-                if not primary_advice and 'advice' in age_specific:
-                    primary_advice = age_specific['advice']
-                
-                # Collect medicines
-                if 'medicines' in age_specific and age_specific['medicines']:
-                    for med in age_specific['medicines'][:2]:
-                        if med not in collected_medicines:
-                            collected_medicines.append(med)
-                
-                # Collect medicine timing
-                if not medicine_timing_info and 'medicine_timing' in age_specific:
-                    medicine_timing_info = age_specific['medicine_timing']
-                
-                # Collect diet
-                if 'diet' in age_specific and age_specific['diet']:
-                    for food in age_specific['diet'][:2]:
-                        if food not in collected_diet:
-                            collected_diet.append(food)
-                
-                # Collect drinks
-                if 'drinks' in age_specific and age_specific['drinks']:
-                    for drink in age_specific['drinks'][:1]:
-                        if drink not in collected_drinks:
-                            collected_drinks.append(drink)
-    
-    # Build ONLY ESSENTIAL recommendations
-    
+
+    for symptom in symptoms:
+        age_specific = get_profile_recommendations(symptom, profile, kb)
+        if not age_specific:
+            continue
+        # Collect primary advice and medicine timing from the first symptom that has them
+        if not primary_advice and 'advice' in age_specific:
+            primary_advice = age_specific['advice']
+        if not medicine_timing_info and 'medicine_timing' in age_specific:
+            medicine_timing_info = age_specific['medicine_timing']
+        for med in (age_specific.get('medicines') or [])[:2]:
+            if med not in collected_medicines:
+                collected_medicines.append(med)
+        for food in (age_specific.get('diet') or [])[:2]:
+            if food not in collected_diet:
+                collected_diet.append(food)
+        for drink in (age_specific.get('drinks') or [])[:1]:
+            if drink not in collected_drinks:
+                collected_drinks.append(drink)
+
+    band_recs = AGE_BAND_RECOMMENDATIONS[band]
+    all_recs = []
+
     # 1. Advice
-    if primary_advice:
-        all_recs.append(f"Advice: {primary_advice}")
-    else:
-        if age_num is not None:
-            if age_num < 5:
-                all_recs.append("Advice: Infants need immediate pediatrician consultation. Monitor hydration and vital signs closely.")
-            elif age_num <= 12:
-                all_recs.append("Advice: Monitor symptoms, ensure adequate rest and hydration.")
-            elif 13 <= age_num <= 18:
-                all_recs.append("Advice: Get complete bed rest and stay well hydrated. Most symptoms improve in 3-5 days.")
-            elif age_num >= 65:
-                all_recs.append("Advice: Elderly patients should seek medical attention early to prevent complications.")
-            else:
-                all_recs.append("Advice: Rest well and stay hydrated. Seek medical care if worsening or persisting.")
-        else:
-            all_recs.append("Advice: Rest, hydration, and proper nutrition are important for recovery.")
-    
+    all_recs.append(f"Advice: {primary_advice}" if primary_advice else band_recs['advice'])
+
     # 2. Medicines
     if collected_medicines:
         all_recs.append(f"Medicines (for {age_cat}):")
         for med in collected_medicines[:2]:
             all_recs.append(f"  • {med}")
-    else:
-        if age_num is not None:
-            if age_num < 5:
-                all_recs.append("Medicines: Consult pediatrician for specific medicines. Avoid over-the-counter medications.")
-            elif age_num <= 12:
-                all_recs.append("Medicines: Paracetamol syrup as recommended by pediatrician.")
-            elif 13 <= age_num <= 18:
-                all_recs.append("Medicines: Crocin 500mg or Dolo 500mg as needed for fever/pain.")
-            elif age_num >= 65:
-                all_recs.append("Medicines: Consult doctor. Avoid NSAIDs. Use paracetamol only.")
-            else:
-                all_recs.append("Medicines: Crocin 650mg or Dolo 500mg as needed.")
-    
+    elif 'medicines' in band_recs:
+        all_recs.append(band_recs['medicines'])
+
     # 3. Medicine Timing
-    if medicine_timing_info:
-        all_recs.append(f"Timing: {medicine_timing_info}")
-    else:
-        all_recs.append("Timing: Every 6 hours with food. Do not exceed daily limits.")
-    
+    all_recs.append(f"Timing: {medicine_timing_info}" if medicine_timing_info else DEFAULT_TIMING_RECOMMENDATION)
+
     # 4. Diet
     if collected_diet:
-        diet_str = ", ".join(collected_diet[:2])
-        all_recs.append(f"Diet: {diet_str} - Avoid spicy, fried, oily foods")
+        all_recs.append(f"Diet: {', '.join(collected_diet[:2])} - Avoid spicy, fried, oily foods")
     else:
-        all_recs.append("Diet: Light warm foods like rice, dal, soup. Avoid spicy and oily foods.")
-    
+        all_recs.append(DEFAULT_DIET_RECOMMENDATION)
+
     # 5. Hydration
     if collected_drinks:
-        drinks_str = ", ".join(collected_drinks[:1])
-        all_recs.append(f"Drinks: {drinks_str} - Drink every 30-60 minutes")
+        all_recs.append(f"Drinks: {collected_drinks[0]} - Drink every 30-60 minutes")
     else:
-        all_recs.append("Drinks: Warm water, herbal tea, coconut water. Drink frequently (3-4 liters/day).")
-    
-    # 6. Rest
-    if age_num is not None:
-        if age_num < 5:
-            all_recs.append("Rest: 16-20 hours sleep. Keep environment calm and cool.")
-        elif age_num <= 12:
-            all_recs.append("Rest: 10-12 hours sleep daily. Minimize physical activity.")
-        elif 13 <= age_num <= 18:
-            all_recs.append("Rest: 8-10 hours sleep. Avoid gym and sports.")
-        elif age_num >= 65:
-            all_recs.append("Rest: 7-9 hours sleep. Monitor blood pressure. Prevent falls.")
-        else:
-            all_recs.append("Rest: 8 hours sleep minimum. Light walking only when better.")
-    
-    # 7. Emergency Signs
-    if age_num is not None:
-        if age_num < 5:
-            all_recs.append("EMERGENCY: If temperature >39°C, difficulty breathing, or no wet diapers >8 hours - SEEK IMMEDIATE CARE")
-        elif age_num <= 12:
-            all_recs.append("EMERGENCY: If fever >104°F, severe breathing difficulty, or confusion - SEEK IMMEDIATE CARE")
-        elif 13 <= age_num <= 18:
-            all_recs.append("EMERGENCY: If fever >104°F, chest pain, or confusion - SEEK IMMEDIATE CARE")
-        elif age_num >= 65:
-            all_recs.append("EMERGENCY: If fever >103°F, chest pain, breathing difficulty, or confusion - SEEK IMMEDIATE CARE")
-        else:
-            all_recs.append("EMERGENCY: If fever >104°F, severe symptoms, or chest pain - SEEK IMMEDIATE CARE")
-    
-    # 8. Follow-up
-    if age_num is not None:
-        if age_num < 5:
-            all_recs.append("Follow-up: If not improving in 24 hours, contact pediatrician immediately.")
-        elif age_num <= 12:
-            all_recs.append("Follow-up: Contact doctor if symptoms persist >3 days.")
-        elif 13 <= age_num <= 18:
-            all_recs.append("Follow-up: Contact doctor if symptoms persist >5 days.")
-        elif age_num >= 65:
-            all_recs.append("Follow-up: Contact doctor immediately if any worsening. Follow-up within 3 days.")
-        else:
-            all_recs.append("Follow-up: Contact doctor if symptoms persist >5-7 days.")
-    
+        all_recs.append(DEFAULT_DRINKS_RECOMMENDATION)
+
+    # 6-8. Rest, emergency signs, follow-up
+    for part in ('rest', 'emergency', 'follow_up'):
+        if part in band_recs:
+            all_recs.append(band_recs[part])
+
     # Remove duplicates while preserving order
-    seen = set()
-    final_recs = []
-    for rec in all_recs:
-        if rec.strip() and rec not in seen:
-            final_recs.append(rec)
-            seen.add(rec)
-    
-    return final_recs
+    return tuple(dict.fromkeys(rec for rec in all_recs if rec.strip()))
+
+
+def age_adjusted_recommendations(disease, age, symptoms, months=None, kb=None):
+    """Return ONLY ESSENTIAL recommendations for disease adjusted by age and specific symptoms.
+    If age is 0, months parameter will be used to compute age in years (e.g., 6 months -> 0.5).
+    Results are memoized per (ordered unique symptoms, age profile, age band, knowledge base).
+    """
+    try:
+        age_num = convert_months_to_years(age, months)
+    except Exception:
+        age_num = None
+
+    # Normalize symptoms; repeats cannot change the output, order can
+    norm_symptoms = tuple(dict.fromkeys(s.lower().strip().replace(' ', '_') for s in (symptoms or []) if s))
+
+    kb = kb or knowledge_base.active()
+    return list(_recommendations_for(norm_symptoms, get_age_profile(age_num), _age_band(age_num), kb))
 
 
 @app.route('/api/predict', methods=['POST'])
@@ -303,10 +359,15 @@ def api_predict():
         data = request.get_json(force=True)
     except Exception:
         return jsonify(success=False, message="Invalid JSON payload.")
+    return jsonify(predict(data))
+
 
+def predict(data):
+    """The /api/predict response body for a parsed request payload (shared by
+    the Flask view and the asyncio path in asgi.py)."""
     symptoms = data.get('symptoms') or []
     if not isinstance(symptoms, list):
-        return jsonify(success=False, message="`symptoms` must be a list of symptom keys.")
+        return dict(success=False, message="`symptoms` must be a list of symptom keys.")
 
     # Normalize symptom tokens to match dataset formatting
     def _normalize(s):
@@ -317,11 +378,11 @@ def api_predict():
 
     norm_symptoms = [_normalize(s) for s in symptoms if s and str(s).strip()]
     if not norm_symptoms:
-        return jsonify(success=False, message="No symptoms provided.")
+        return dict(success=False, message="No symptoms provided.")
 
     ds = _load_dataset()
     if not ds:
-        return jsonify(success=False, message="No dataset available on server (dataset.json missing).")
+        return dict(success=False, message="No dataset available on server (dataset.json missing).")
 
     # compute Jaccard similarity between two symptom lists
     def jaccard(a, b):
@@ -333,32 +394,33 @@ def api_predict():
         union = sa.union(sb)
         return float(len(inter)) / float(len(union)) if union else 0.0
 
-    # prepare dataset records with normalized symptom tokens
-    records = []
-    for r in ds:
-        rs = r.get('symptoms') or []
-        rn = [_normalize(x) for x in rs if x and str(x).strip()]
-        records.append({'disease': r.get('disease') or 'Unknown', 'symptoms': rn, 'raw': r})
-
-    # compute similarity for each record
-    sims = []
-    for rec in records:
-        sim = jaccard(norm_symptoms, rec['symptoms'])
-        sims.append((rec, sim))
-
-    # select top-k neighbors by similarity
-    k = min(5, max(1, len(sims)))
-    sims_sorted = sorted(sims, key=lambda x: x[1], reverse=True)
-    neighbors = sims_sorted[:k]
-
-    # If no similarity at all, still try to pick best match by shared symptom count
-    if all(sim <= 0.0 for (_r, sim) in neighbors):
-        # fallback: pick record(s) with largest intersection size
-        def inter_size(a, b):
-            return len(set(a).intersection(set(b)))
-        scored = [(rec, inter_size(norm_symptoms, rec['symptoms'])) for rec in records]
-        scored_sorted = sorted(scored, key=lambda x: x[1], reverse=True)
-        neighbors = [(r, 0.0 if s == 0 else float(s)) for (r, s) in scored_sorted[:k]]
+    with stage("jaccard_scoring"):
+        # prepare dataset records with normalized symptom tokens
+        records = []
+        for r in ds:
+            rs = r.get('symptoms') or []
+            rn = [_normalize(x) for x in rs if x and str(x).strip()]
+            records.append({'disease': r.get('disease') or 'Unknown', 'symptoms': rn, 'raw': r})
+
+        # compute similarity for each record
+        sims = []
+        for rec in records:
+            sim = jaccard(norm_symptoms, rec['symptoms'])
+            sims.append((rec, sim))
+
+        # select top-k neighbors by similarity
+        k = min(5, max(1, len(sims)))
+        sims_sorted = sorted(sims, key=lambda x: x[1], reverse=True)
+        neighbors = sims_sorted[:k]
+
+        # If no similarity at all, still try to pick best match by shared symptom count
+        if all(sim <= 0.0 for (_r, sim) in neighbors):
+            # fallback: pick record(s) with largest intersection size
+            def inter_size(a, b):
+                return len(set(a).intersection(set(b)))
+            scored = [(rec, inter_size(norm_symptoms, rec['symptoms'])) for rec in records]
+            scored_sorted = sorted(scored, key=lambda x: x[1], reverse=True)
+            neighbors = [(r, 0.0 if s == 0 else float(s)) for (r, s) in scored_sorted[:k]]
 
     # weighted voting by similarity (use small epsilon so zero-sim neighbors still contribute minimally)
     votes = {}
@@ -373,7 +435,7 @@ def api_predict():
         weights[lab] = weights.get(lab, 0.0) + w
 
     if not votes:
-        return jsonify(success=False, message="Unable to predict from dataset.")
+        return dict(success=False, message="Unable to predict from dataset.")
 
     # pick disease with highest total weight
     pred = max(votes.items(), key=lambda x: x[1])[0]
@@ -388,37 +450,73 @@ def api_predict():
 
     age = (data.get('patient') or {}).get('age')
     months = (data.get('patient') or {}).get('months')  # Get months if age is 0
-    recs = age_adjusted_recommendations(pred, age, norm_symptoms, months)
+    kb = knowledge_base.active()
+    with stage("recommendations"):
+        recs = age_adjusted_recommendations(pred, age, norm_symptoms, months, kb=kb)
 
     # build neighbor info to return (disease, similarity, symptoms)
     neighbors_out = []
     for rec, sim in neighbors:
         neighbors_out.append({'disease': rec.get('disease'), 'similarity': float(sim), 'symptoms': rec.get('symptoms')})
 
-    return jsonify(success=True, disease=pred, confidence=confidence, risk=risk, recommendations=recs, neighbors=neighbors_out)
+    return dict(success=True, disease=pred, confidence=confidence, risk=risk, recommendations=recs, neighbors=neighbors_out, kb_version=kb.version)
 
 
-@app.route('/api/baby-thinking', methods=['POST'])
-def baby_thinking():
-    """Real-time thinking process for baby recommendations"""
-    data = request.json or {}
-    symptom = data.get('symptom', '').lower()
+def _baby_thinking_args(data):
+    """Validate symptom/months for the baby-thinking endpoints.
+    Returns (symptom, months, None) or (None, None, error_response)."""
+    symptom = (data.get('symptom') or '').lower()
     months = data.get('months')
     
     if not symptom or months is None:
-        return jsonify(success=False, error='Missing symptom or months'), 400
+        return None, None, (jsonify(success=False, error='Missing symptom or months'), 400)
     
     try:
         months = int(months)
         if months < 0 or months > 12:
-            return jsonify(success=False, error='Months must be between 0 and 12'), 400
+            return None, None, (jsonify(success=False, error='Months must be between 0 and 12'), 400)
     except:
-        return jsonify(success=False, error='Invalid months value'), 400
+        return None, None, (jsonify(success=False, error='Invalid months value'), 400)
+    return symptom, months, None
+
+
+def _thinking_event_stream(thinking):
+    """Server-Sent Events for a thinking result: one `step` event per analysis
+    step, then a `done` event with the reasoning and final recommendation.
+    Everything is precomputed, so the body is written in one go and the worker
+    is released immediately; the UI paces the display on its side."""
+    def generate():
+        for step in thinking['analysis_steps']:
+            yield f"event: step\ndata: {json.dumps(step, ensure_ascii=False)}\n\n"
+        done = {'reasoning': thinking['reasoning'], 'final_recommendation': thinking['final_recommendation']}
+        yield f"event: done\ndata: {json.dumps(done, ensure_ascii=False)}\n\n"
+    return app.response_class(generate(), mimetype='text/event-stream',
+                              headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/baby-thinking', methods=['POST'])
+def baby_thinking():
+    """Real-time thinking process for baby recommendations.
+    Send `Accept: text/event-stream` to receive the steps as Server-Sent Events."""
+    symptom, months, error = _baby_thinking_args(request.json or {})
+    if error:
+        return error
     
-    thinking = get_realtime_thinking_for_babies(symptom, months)
+    thinking = get_cached_thinking(symptom, months)
+    if request.accept_mimetypes.best == 'text/event-stream':
+        return _thinking_event_stream(thinking)
     return jsonify(success=True, thinking=thinking)
 
 
+@app.route('/api/baby-thinking/stream', methods=['GET'])
+def baby_thinking_stream():
+    """EventSource-friendly variant: /api/baby-thinking/stream?symptom=fever&months=4"""
+    symptom, months, error = _baby_thinking_args(request.args)
+    if error:
+        return error
+    return _thinking_event_stream(get_cached_thinking(symptom, months))
+
+
 # ---------------- SMTP helpers (replaced after accidental edit)
 def _build_message(to_email: str, subject: str, body: str) -> EmailMessage:
     msg = EmailMessage()
@@ -428,56 +526,117 @@ def _build_message(to_email: str, subject: str, body: str) -> EmailMessage:
     msg.set_content(body, charset="utf-8")
     return msg
 
-def _send_tls(host, port, user, pwd, to_email, msg: EmailMessage):
+def _connect_tls(host, port, user, pwd):
     context = ssl.create_default_context()
-    with smtplib.SMTP(host, port, timeout=25) as server:
-        if SMTP_DEBUG: server.set_debuglevel(1)
-        server.ehlo()
-        server.starttls(context=context)
-        server.ehlo()
-        server.login(user, pwd)
-        server.send_message(msg)
-
-def _send_ssl(host, port, user, pwd, to_email, msg: EmailMessage):
+    server = smtplib.SMTP(host, port, timeout=25)
+    if SMTP_DEBUG: server.set_debuglevel(1)
+    server.ehlo()
+    server.starttls(context=context)
+    server.ehlo()
+    server.login(user, pwd)
+    return server
+
+def _connect_ssl(host, port, user, pwd):
     context = ssl.create_default_context()
-    with smtplib.SMTP_SSL(host, port, context=context, timeout=25) as server:
-        if SMTP_DEBUG: server.set_debuglevel(1)
+    server = smtplib.SMTP_SSL(host, port, context=context, timeout=25)
+    if SMTP_DEBUG: server.set_debuglevel(1)
+    server.login(user, pwd)
+    return server
+
+def _connect_plain(host, port, user, pwd):
+    """Unencrypted session for local stand-in SMTP servers (SMTP_SECURITY=none)."""
+    server = smtplib.SMTP(host, port, timeout=25)
+    if SMTP_DEBUG: server.set_debuglevel(1)
+    server.ehlo()
+    if server.has_extn("auth") and pwd:
         server.login(user, pwd)
-        server.send_message(msg)
+    return server
+
+def _smtp_transports():
+    """(name, connect) pairs for SMTP_SECURITY, in default preference order."""
+    creds = (SMTP_EMAIL, SMTP_APP_PASSWORD)
+    if SMTP_SECURITY == "none":
+        return [(f"PLAIN({SMTP_HOST}:{SMTP_PORT})", lambda: _connect_plain(SMTP_HOST, SMTP_PORT, *creds))]
+    if SMTP_SECURITY == "ssl":
+        return [(f"SSL({SMTP_HOST}:{SMTP_PORT})", lambda: _connect_ssl(SMTP_HOST, SMTP_PORT, *creds))]
+    return [
+        (f"TLS({SMTP_HOST}:{SMTP_PORT})", lambda: _connect_tls(SMTP_HOST, SMTP_PORT, *creds)),
+        (f"SSL({SMTP_HOST}:465)", lambda: _connect_ssl(SMTP_HOST, 465, *creds)),
+    ]
+
+# Persistent logged-in sessions shared by every send_mail call (smtp_pool.py)
+smtp_pool = SMTPPool(_smtp_transports())
+atexit.register(smtp_pool.close_all)
 
 def send_mail(to_email: str, subject: str, body: str):
-    msg = _build_message(to_email, subject, body)
-    tls_err = None
-    try:
-        _send_tls(SMTP_HOST, SMTP_PORT, SMTP_EMAIL, SMTP_APP_PASSWORD, to_email, msg)
-        return
-    except Exception as e:
-        tls_err = e
-    try:
-        _send_ssl(SMTP_HOST, 465, SMTP_EMAIL, SMTP_APP_PASSWORD, to_email, msg)
-        return
-    except Exception as ssl_err:
-        raise RuntimeError(
-            f"TLS({SMTP_HOST}:{SMTP_PORT}) failed: {type(tls_err).__name__}: {tls_err} | "
-            f"SSL({SMTP_HOST}:465) failed: {type(ssl_err).__name__}: {ssl_err}"
-        ) from ssl_err
+    with stage("smtp_send"):
+        smtp_pool.send(_build_message(to_email, subject, body))
 
-def send_otp_email(to_email: str, otp: str):
-    body = (
+def _otp_email_body(otp: str) -> str:
+    return (
         f"Hello,\n\n"
         f"Your One-Time Password (OTP) is: {otp}\n\n"
         f"It expires in {OTP_EXP_MINUTES} minutes.\n"
         f"If you did not request this, please ignore this email.\n\n"
         f"Thanks,\n{SENDER_NAME}\n"
     )
-    send_mail(to_email, "Your OTP Code", body)
+
+def send_otp_email(to_email: str, otp: str):
+    send_mail(to_email, "Your OTP Code", _otp_email_body(otp))
+
+def enqueue_otp_email(to_email: str, otp: str) -> str:
+    """Queue the OTP mail for background delivery; returns the mail job id."""
+    return mail_queue.enqueue(to_email, "Your OTP Code", _otp_email_body(otp))
+
+# Background delivery with retries/backoff and a dead-letter log (mail_queue.py)
+mail_queue = MailQueue(send_mail)
+atexit.register(mail_queue.stop)
 
 # ---------------- UI ----------------
 @app.route("/")
 def root():
-    return send_from_directory(".", "index.html")
+    return static_assets.response("/", check_files=app.debug)
+
+@app.route("/static/<path:name>")
+def static_file(name):
+    return static_assets.response(f"/static/{name}", check_files=app.debug)
 
 # ---------------- Auth ----------------
+def _hasher_busy():
+    return jsonify(success=False, message="Server is busy. Please try again in a moment."), 503
+
+def _request_token(data=None):
+    """Session token from `Authorization: Bearer <token>` or a "token" field in the JSON body."""
+    auth = request.headers.get("Authorization", "")
+    if auth.startswith("Bearer "):
+        return auth[7:].strip()
+    return (data or {}).get("token") or ""
+
+def _session_email(data):
+    """(email, error_response): the signed-in user's email, or a 401/403 response
+    when the token is missing, invalid, expired or for another account."""
+    claims = verify_token(_request_token(data), role="user")
+    if claims is None:
+        return None, (jsonify(success=False, message="Session expired. Please log in again."), 401)
+    email = (data.get("email") or "").strip().lower()
+    if email and email != claims["sub"]:
+        return None, (jsonify(success=False, message="Token does not match this account."), 403)
+    return claims["sub"], None
+
+def _account_gone(email):
+    """401 response if `email` has no account any more (deleted while one of its
+    session tokens was still out), else None. Call with `lock` held, so a
+    delete_user cannot run between this check and the write that follows."""
+    if email not in user_index.users_view().users:
+        return jsonify(success=False, message="Account not found. Please log in again."), 401
+    return None
+
+def _admin_denied(data):
+    """None if the request carries a valid admin token, else a 401 response."""
+    if verify_token(data.get("admin_token", ""), role="admin") is None:
+        return jsonify(success=False, message="Invalid or expired admin token"), 401
+    return None
+
 @app.route("/api/signup", methods=["POST"])
 def signup():
     data = request.get_json()
@@ -493,13 +652,24 @@ def signup():
     if not email or not password:
         return jsonify(success=False, message="Email and password are required.")
 
+    with lock:
+        users = get_users()
+        if isinstance(users, dict) and email in users:
+            return jsonify(success=False, message="Email already exists.")
+
+    # Hash outside the lock (on the hasher pool), then re-check before writing
+    try:
+        password_hash = hasher.hash(password)
+    except HasherBusy:
+        return _hasher_busy()
+
     with lock:
         users = get_users()
         if isinstance(users, dict) and email in users:
             return jsonify(success=False, message="Email already exists.")
         users[email] = {
             "email": email,
-            "password_hash": generate_password_hash(password),
+            "password_hash": password_hash,
             "username": username,
             "phone": phone,
             "address": address,
@@ -521,59 +691,48 @@ def login():
         users = get_users()
         user = users.get(email) if isinstance(users, dict) else None
 
-    if not user or "password_hash" not in user or not check_password_hash(user["password_hash"], password):
+    if not user or "password_hash" not in user:
         return jsonify(success=False, message="Invalid credentials.")
+    try:
+        if not hasher.verify(user["password_hash"], password):
+            return jsonify(success=False, message="Invalid credentials.")
+    except HasherBusy:
+        return _hasher_busy()
     profile = {
         "email": email,
         "username": user.get("username") or "",
         "phone": user.get("phone") or "",
         "address": user.get("address") or ""
     }
-    return jsonify(success=True, user=profile)
+    return jsonify(success=True, user=profile, token=issue_token(email))
 
 # ---------------- OTP / Reset ----------------
 @app.route("/api/send-otp", methods=["POST"])
 def send_otp():
     data = request.get_json(force=True)
-    email = (data.get("email") or "").strip().lower()
+    return jsonify(issue_otp(data.get("email")))
+
+def issue_otp(email):
+    """Issue and queue an OTP for `email`; the /api/send-otp response body."""
+    email = (email or "").strip().lower()
     if not email:
-        return jsonify(success=False, message="Email required.")
+        return dict(success=False, message="Email required.")
 
     with lock:
         now = datetime.utcnow()
-        info = OTP_STORE.get(email)
-        if info and info.get("last_sent") and (now - info["last_sent"]).total_seconds() < OTP_RATE_LIMIT_SECONDS:
-            return jsonify(success=False, message="Please wait before requesting another OTP.")
         otp = f"{random.randint(0, 999999):06d}"
-        OTP_STORE[email] = {
-            "otp": otp,
-            "expires": now + timedelta(minutes=OTP_EXP_MINUTES),
-            "last_sent": now,
-            "verified": False
-        }
+        if not OTP_STORE.issue(email, otp, now, OTP_EXP_MINUTES * 60, OTP_RATE_LIMIT_SECONDS):
+            return dict(success=False, message="Please wait before requesting another OTP.")
 
-    try:
-        send_otp_email(email, otp)
-    except smtplib.SMTPAuthenticationError as e:
-        return jsonify(success=False, message="SMTP authentication failed. Check SMTP_EMAIL and SMTP_APP_PASSWORD.", detail=str(e))
-    except smtplib.SMTPConnectError as e:
-        return jsonify(success=False, message=f"SMTP connect error to {SMTP_HOST}.", detail=str(e))
-    except smtplib.SMTPServerDisconnected as e:
-        return jsonify(success=False, message="SMTP server disconnected unexpectedly.", detail=str(e))
-    except smtplib.SMTPRecipientsRefused as e:
-        return jsonify(success=False, message="Recipient refused by SMTP server.", detail=str(e.recipients))
-    except (socket.timeout, TimeoutError) as e:
-        return jsonify(success=False, message=f"SMTP timeout when contacting {SMTP_HOST}.", detail=str(e))
-    except Exception as e:
-        # include both types and traceback tail for quick debugging
-        tb = traceback.format_exc(limit=2)
-        return jsonify(success=False, message=f"Send failed: {type(e).__name__}", detail=f"{e}", trace=tb)
+    # Delivery happens on the mail queue's worker; SMTP failures are retried
+    # there and end up in the dead-letter log instead of blocking this request.
+    mail_id = enqueue_otp_email(email, otp)
 
-    # Successful send — return response. In development you can enable DEBUG_SHOW_OTP=1 to return the OTP
-    resp = {"success": True, "message": "OTP sent to your email."}
-    if os.environ.get('DEBUG_SHOW_OTP') == '1':
+    # In development you can enable DEBUG_SHOW_OTP=1 to return the OTP
+    resp = {"success": True, "message": "OTP sent to your email.", "mail_id": mail_id}
+    if app.config["DEBUG_SHOW_OTP"]:
         resp['debug_otp'] = otp
-    return jsonify(resp)
+    return resp
 
 @app.route("/api/verify-otp", methods=["POST"])
 def verify_otp():
@@ -588,15 +747,14 @@ def verify_otp():
         if not info:
             # No OTP found for this exact email — provide clearer guidance
             return jsonify(success=False, message="No OTP issued for this email. Please request a new OTP and ensure you use the same email address.")
-        if datetime.utcnow() > info["expires"]:
+        if datetime.utcnow() > info.expires:
             return jsonify(success=False, message="OTP expired. Request a new one.")
-        if otp != info["otp"]:
+        if otp != info.otp:
             # Offer hint about remaining time (without revealing OTP)
-            secs_left = int((info["expires"] - datetime.utcnow()).total_seconds()) if info.get("expires") else None
+            secs_left = int((info.expires - datetime.utcnow()).total_seconds())
             hint = f" Time left: {secs_left}s." if secs_left and secs_left>0 else ""
             return jsonify(success=False, message="Invalid OTP." + hint)
-        info["verified"] = True
-        OTP_STORE[email] = info
+        OTP_STORE.mark_verified(email)
 
         # Persist verification status to the user record (so admin UI shows Verified)
         try:
@@ -622,8 +780,8 @@ def otp_status():
         info = OTP_STORE.get(email)
         if not info:
             return jsonify(success=False, message="No OTP for this email")
-        secs_left = int((info["expires"] - datetime.utcnow()).total_seconds()) if info.get("expires") else None
-        return jsonify(success=True, email=email, expires_in_seconds=secs_left, verified=bool(info.get("verified", False)))
+        secs_left = int((info.expires - datetime.utcnow()).total_seconds())
+        return jsonify(success=True, email=email, expires_in_seconds=secs_left, verified=info.verified)
 
 @app.route("/api/reset-password", methods=["POST"])
 def reset_password():
@@ -633,151 +791,45 @@ def reset_password():
     if not email or not new_password:
         return jsonify(success=False, message="Email and new password required.")
 
+    info = OTP_STORE.get(email)
+    if not info or not info.verified:
+        return jsonify(success=False, message="OTP not verified.")
+    try:
+        password_hash = hasher.hash(new_password)
+    except HasherBusy:
+        return _hasher_busy()
+
     with lock:
         info = OTP_STORE.get(email)
-        if not info or not info.get("verified"):
+        if not info or not info.verified:
             return jsonify(success=False, message="OTP not verified.")
         users = get_users()
         if email not in users:
             return jsonify(success=False, message="No account for this email.")
-        users[email]["password_hash"] = generate_password_hash(new_password)
+        users[email]["password_hash"] = password_hash
         save_users(users)
-        OTP_STORE.pop(email, None)
+        OTP_STORE.discard(email)
 
     return jsonify(success=True, message="Password reset successfully.")
 
 
-# ---------------- Report Parsing (PDF) ----------------
-import re as _re
+# Minimum classifier confidence before an upload is reported as the wrong report type
+MISMATCH_MIN_CONFIDENCE = 0.6
 
-def _extract_number(labels, text):
-    """
-    Find the first numeric value appearing near any of the given labels.
-    Returns the matched numeric string or "" if not found.
-    Improved: handles various spacing and line breaks.
-    """
-    if not text:
-        return ""
-    for label in labels:
-        # Try multiple pattern variations to handle different PDF layouts
-        patterns = [
-            rf"{label}\s*[:\-]?\s*([0-9]+(?:\.[0-9]+)?)",  # label: number
-            rf"{label}[^0-9\-\.]{0,40}([0-9]+(?:\.[0-9]+)?)",  # label followed by up to 40 chars then number
-            rf"{label}[^\n]*?([0-9]+(?:\.[0-9]+)?)",  # label, then any chars until number on same/next line
-        ]
-        for pattern in patterns:
-            m = _re.search(pattern, text, flags=_re.IGNORECASE | _re.DOTALL)
-            if m:
-                return m.group(1)
-    return ""
-
-def parse_lab_text(test_key, text):
-    """
-    Improved heuristic parser that looks for common words in the PDF text
-    and extracts lab values. Handles various PDF formatting and spacing issues.
-    """
-    if not isinstance(text, str):
-        text = text.decode("utf-8", errors="ignore") if hasattr(text, "decode") else str(text)
-    lower = text.lower()
-    data = {}
-
-    if test_key == "cbc":
-        # Complete Blood Count
-        data["platelets"]  = _extract_number(["platelet", "plt", "thrombocyte"], lower)
-        data["wbc"]        = _extract_number(["wbc", "white blood cell", "white blood", "leukocyte"], lower)
-        data["hemoglobin"] = _extract_number(["hemoglobin", "hb", "hgb"], lower)
-
-    elif test_key == "blood_sugar":
-        # Blood Glucose Test
-        data["fasting"] = _extract_number(["fasting blood", "fbs", "fasting glucose", "fasting plasma"], lower)
-        data["pp"]      = _extract_number(["pp", "post prandial", "postprandial", "post-prandial", "2 hours"], lower)
-
-    elif test_key == "kidney_function":
-        # Kidney Function Test
-        data["creatinine"] = _extract_number(["creatinine", "serum creatinine"], lower)
-        data["egfr"]       = _extract_number(["egfr", "gfr", "estimated gfr"], lower)
-
-    elif test_key == "dengue_ns1":
-        # Dengue NS1 Antigen - look for positive/negative across multiple patterns
-        patterns_pos = [
-            r"ns1[^\n]{0,50}(positive|reactive|detected)",
-            r"dengue[^\n]{0,50}(positive|reactive|detected)",
-            r"antigen[^\n]{0,50}(positive|reactive|detected)",
-        ]
-        patterns_neg = [
-            r"ns1[^\n]{0,50}(negative|non.?reactive|not detected)",
-            r"dengue[^\n]{0,50}(negative|non.?reactive|not detected)",
-            r"antigen[^\n]{0,50}(negative|non.?reactive|not detected)",
-        ]
-        
-        is_positive = any(_re.search(p, lower, _re.IGNORECASE) for p in patterns_pos)
-        is_negative = any(_re.search(p, lower, _re.IGNORECASE) for p in patterns_neg)
-        
-        if is_positive:
-            data["ns1"] = "positive"
-        elif is_negative:
-            data["ns1"] = "negative"
-        else:
-            data["ns1"] = ""
-
-    elif test_key == "malaria_test":
-        # Malaria Test - look for multiple patterns
-        patterns_pos = [
-            r"(malaria|plasmodium)[^\n]{0,50}(positive|detected|present)",
-            r"blood\s*smear[^\n]{0,50}(positive|detected)",
-        ]
-        patterns_neg = [
-            r"(malaria|plasmodium)[^\n]{0,50}(negative|not detected|absent)",
-            r"blood\s*smear[^\n]{0,50}(negative|not detected)",
-        ]
-        
-        is_positive = any(_re.search(p, lower, _re.IGNORECASE) for p in patterns_pos)
-        is_negative = any(_re.search(p, lower, _re.IGNORECASE) for p in patterns_neg)
-        
-        if is_positive:
-            data["parasite"] = "positive"
-        elif is_negative:
-            data["parasite"] = "negative"
-        else:
-            data["parasite"] = ""
-
-    elif test_key == "widal":
-        # Widal Test - look for titers like 1:80, 1:160, 1:320
-        patterns = [
-            r"1\s*:\s*(40|80|160|320)",
-            r"(40|80|160|320)(?=\s*$|\s*\n|\s*;)",  # titer alone on a line
-        ]
-        for pattern in patterns:
-            m = _re.search(pattern, lower)
-            if m:
-                data["titer"] = m.group(0).replace(" ", "")
-                break
-        if "titer" not in data:
-            data["titer"] = ""
-
-    elif test_key == "ecg":
-        # ECG interpretation
-        patterns_abnormal = [
-            r"ecg[^\n]{0,50}(abnormal|ischemia|infarct|st.?t\s*changes|arrhythmia)",
-            r"(abnormal|ischemia|infarct|arrhythmia).*ecg",
-        ]
-        patterns_normal = [
-            r"ecg[^\n]{0,50}(normal|no acute)",
-            r"normal.*ecg",
-        ]
-        
-        is_abnormal = any(_re.search(p, lower, _re.IGNORECASE) for p in patterns_abnormal)
-        is_normal = any(_re.search(p, lower, _re.IGNORECASE) for p in patterns_normal)
-        
-        if is_abnormal:
-            data["abnormal"] = "abnormal"
-        elif is_normal:
-            data["abnormal"] = "normal"
-        else:
-            data["abnormal"] = ""
-
-    return data
+def _parsed_or_flagged(key, full_text):
+    """Parse report text for `key`, flagging reports where no fields were found."""
+    parsed = parse_lab_text(key, full_text)
 
+    # If all extracted fields are empty → check whether PDF had readable text.
+    # If the PDF is essentially empty, mark as wrong report. If it had text
+    # but parser couldn't find expected patterns, return a warning instead
+    # (frontend will not treat this as a "wrong report" upload).
+    if parsed and all(v == "" for v in parsed.values()):
+        if not full_text or len(full_text.strip()) < 80:
+            return {"_error": "missing_required_fields"}
+        # text present but no fields matched — return parsed plus a warning
+        return {"_warning": "no_fields_extracted", "_text_length": len(full_text)}
+    return parsed
 
 # ---------------- Report Analysis API ----------------
 @app.route("/api/analyze-reports", methods=["POST"])
@@ -786,63 +838,88 @@ def analyze_reports():
     Accepts uploaded PDF files for the recommended tests, extracts basic values
     using PyPDF2, and returns a JSON object mapping each test key to a simple
     dict of fields (platelets, wbc, etc.). The frontend then calculates scores.
+
+    Each upload is classified by report type during extraction. A file sent as
+    `file_<key>` that is clearly another report is flagged `wrong_report_type`
+    and parsed under the detected key instead; files sent as `file_auto` are
+    routed by detection alone. Both cases are described in `warnings`.
     """
     tests_raw = (request.form.get("tests") or "").strip()
     if not tests_raw:
         return jsonify(success=False, message="No tests provided.")
 
+    tests = requested_tests(tests_raw)
+    uploads = {key: request.files.get(f"file_{key}") for key in tests}
+    return jsonify(analyze_uploads(tests, uploads, request.files.getlist("file_auto")))
+
+def requested_tests(tests_raw):
+    """Test keys from the `tests` form field (JSON list or comma-separated)."""
     try:
         if tests_raw.startswith("["):
-            tests = json.loads(tests_raw)
-        else:
-            tests = [t.strip() for t in tests_raw.split(",") if t.strip()]
+            return json.loads(tests_raw)
+        return [t.strip() for t in tests_raw.split(",") if t.strip()]
     except Exception:
-        tests = [t.strip() for t in tests_raw.split(",") if t.strip()]
+        return [t.strip() for t in tests_raw.split(",") if t.strip()]
 
+def _extract_report(f):
+    with stage("pdf_extract"):
+        return extract_and_classify(f)
+
+def analyze_uploads(tests, uploads, auto_uploads, extract=_extract_report):
+    """The /api/analyze-reports response body. `uploads` maps test key ->
+    uploaded file (or None), `auto_uploads` are the `file_auto` files, and
+    `extract(file)` returns extract_and_classify's result for one of them
+    (asgi.py passes a lookup of results computed in worker processes)."""
     result_data = {}
+    warnings = []
+    routed = {}  # detected key -> (text, source, is_auto) for uploads to re-route
     for key in tests:
         file_key = f"file_{key}"
-        f = request.files.get(file_key)
+        f = uploads.get(key)
         if not f:
             continue
         try:
-            reader = PdfReader(f)
-            text_chunks = []
-            for page in reader.pages:
-                try:
-                    page_text = page.extract_text() or ""
-                except Exception:
-                    page_text = ""
-                text_chunks.append(page_text)
-            full_text = "\n".join(text_chunks)
-            parsed = parse_lab_text(key, full_text)
-
-            # If all extracted fields are empty → check whether PDF had readable text.
-            # If the PDF is essentially empty, mark as wrong report. If it had text
-            # but parser couldn't find expected patterns, return a warning instead
-            # (frontend will not treat this as a "wrong report" upload).
-            if parsed and all(v == "" for v in parsed.values()):
-                if not full_text or len(full_text.strip()) < 80:
-                    result_data[key] = {"_error": "missing_required_fields"}
-                else:
-                    # text present but no fields matched — return parsed plus a warning
-                    result_data[key] = {"_warning": "no_fields_extracted", "_text_length": len(full_text)}
-            else:
-                result_data[key] = parsed
-
-
+            # Text is classified while it is extracted, so a mismatched upload
+            # can be re-routed without reading the PDF a second time.
+            full_text, detected, confidence, _scores = extract(f)
+            if detected and detected != key and confidence >= MISMATCH_MIN_CONFIDENCE:
+                warnings.append(mismatch_warning(key, detected, confidence))
+                result_data[key] = {"_error": "wrong_report_type", "_detected_test": detected}
+                routed.setdefault(detected, (full_text, file_key, False))
+                continue
+            result_data[key] = _parsed_or_flagged(key, full_text)
         except Exception as e:
             result_data[key] = {"_error": f"Failed to read PDF: {type(e).__name__}: {e}"}
 
-    return jsonify(success=True, data=result_data)
+    # Untyped uploads: classify and route each one to the parser it matches
+    for f in auto_uploads:
+        try:
+            full_text, detected, confidence, _scores = extract(f)
+        except Exception as e:
+            warnings.append({"type": "unreadable_report", "file": f.filename, "message": f"{type(e).__name__}: {e}"})
+            continue
+        if not detected:
+            warnings.append({"type": "unknown_report_type", "file": f.filename})
+            continue
+        routed.setdefault(detected, (full_text, f.filename, True))
+
+    for detected, (full_text, source, is_auto) in routed.items():
+        if detected in result_data and "_error" not in result_data[detected]:
+            continue  # the correct report was uploaded under its own key too
+        if detected not in tests and not is_auto:
+            continue  # not a test the client asked about
+        result_data[detected] = _parsed_or_flagged(detected, full_text)
+        warnings.append({"type": "routed_report", "source": source, "test": detected})
+
+    return dict(success=True, data=result_data, warnings=warnings)
 # ---------------- Results ----------------
 @app.route("/api/save-result", methods=["POST"])
 def save_result():
     try:
         data = request.get_json(force=True)
-        email = (data.get("email") or "").strip().lower()
-        if not email:
-            return jsonify(success=False, message="Email is required.")
+        email, denied = _session_email(data)
+        if denied:
+            return denied
 
         record = {
             "email": email,
@@ -858,7 +935,12 @@ def save_result():
         }
         
         with lock:
+            gone = _account_gone(email)
+            if gone:
+                return gone
             store = get_results_store()
+            index = user_index.load(store)
+            counters = analytics.load(store)
             
             # Generate Patient ID for new record
             patient_id = generate_patient_id_backend(record, email)
@@ -866,6 +948,8 @@ def save_result():
             
             store.setdefault(email, []).append(record)
             save_results_store(store)
+            user_index.record_saved(index, email, record)
+            analytics.record_saved(counters, record)
         return jsonify(success=True, message="Saved.", patient_id=patient_id)
     except Exception as e:
         print(f"save_result error: {e}")
@@ -876,51 +960,19 @@ def save_result():
 @app.route("/api/get-results", methods=["POST"])
 def get_results():
     data = request.get_json(force=True)
-    email = (data.get("email") or "").strip().lower()
-    if not email:
-        return jsonify(success=False, message="Email is required.")
+    email, denied = _session_email(data)
+    if denied:
+        return denied
     with lock:
+        gone = _account_gone(email)
+        if gone:
+            return gone
         store = get_results_store()
         rows = store.get(email, [])
-        
-        # Fix duplicate Patient IDs
-        first_letter = email[0].lower() if email else "p"
-        assigned_ids = set()
-        next_id = 101
-        
-        # First pass: collect already assigned valid IDs
-        for record in rows:
-            if record.get("patient_id"):
-                id_str = record.get("patient_id", "")
-                num_str = ''.join(filter(str.isdigit, id_str))
-                if num_str:
-                    id_num = int(num_str)
-                    assigned_ids.add(id_num)
-                    next_id = max(next_id, id_num + 1)
-        
-        # Second pass: reassign duplicate IDs
-        seen_ids = {}
-        for record in rows:
-            patient_id = record.get("patient_id")
-            if patient_id:
-                num_str = ''.join(filter(str.isdigit, patient_id))
-                if num_str:
-                    id_num = int(num_str)
-                    # Check if this ID was already assigned to another record
-                    if id_num in seen_ids:
-                        # This is a duplicate, assign new ID
-                        while next_id in assigned_ids:
-                            next_id += 1
-                        new_id = f"{first_letter}{next_id}"
-                        record["patient_id"] = new_id
-                        assigned_ids.add(next_id)
-                        next_id += 1
-                    else:
-                        seen_ids[id_num] = True
-        
-        # Save updated records
-        save_results_store(store)
-        rows = store.get(email, [])
+        # Write back only if an ID was reassigned: rewriting results.json makes
+        # user_index.json and analytics.json stale, forcing a full rescan
+        if _dedupe_patient_ids(email, rows):
+            save_results_store(store)
         
         # Sort by Patient ID in increasing order
         rows_sorted = sorted(rows, key=lambda r: int(''.join(filter(str.isdigit, r.get("patient_id", "0")))) or 0)
@@ -951,6 +1003,31 @@ def smtp_check():
         except Exception as e2:
             return jsonify(ok=False, error=f"TLS failed: {type(e1).__name__}: {e1} | SSL failed: {type(e2).__name__}: {e2}")
 
+@app.route("/api/mail-status", methods=["POST"])
+def mail_status():
+    """Delivery status of a queued mail (mail_id from /api/send-otp; admin only).
+    Queue, SMTP pool and hashing counters are exported at /metrics."""
+    data = request.get_json() or {}
+    denied = _admin_denied(data)
+    if denied:
+        return denied
+    mail_id = (data.get("mail_id") or "").strip()
+    status = mail_queue.status(mail_id) if mail_id else None
+    return jsonify(success=status is not None, mail_id=mail_id, status=status)
+
+# Prometheus scrape endpoint; set METRICS_TOKEN to require "Authorization: Bearer <token>"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+metrics.registry.add_collector("mail_queue", "Mail queue counters (per process).", mail_queue.stats)
+metrics.registry.add_collector("smtp_pool", "SMTP session pool counters (per process).", smtp_pool.stats)
+metrics.registry.add_collector("password_hasher", "Password hashing pool counters (per process).", hasher.stats)
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    if METRICS_TOKEN and not hmac.compare_digest(_request_token() or "", METRICS_TOKEN):
+        return Response("unauthorized\n", status=401, mimetype="text/plain")
+    return Response(metrics.registry.render(), mimetype="text/plain; version=0.0.4")
+
 @app.route("/api/smtp-test-send", methods=["POST"])
 def smtp_test_send():
     """
@@ -984,40 +1061,81 @@ def admin_login():
             return jsonify(success=False, message="Email and password required")
         
         # Simple check: verify against hardcoded admin credentials
-        if email == ADMIN_EMAIL and password == ADMIN_PASSWORD:
-            # Generate a simple token (in production, use JWT)
-            admin_token = generate_password_hash(f"{email}:{datetime.now()}")
-            return jsonify(success=True, admin_token=admin_token)
+        if hmac.compare_digest(email.encode(), ADMIN_EMAIL.encode()) & hmac.compare_digest(password.encode(), ADMIN_PASSWORD.encode()):
+            # Signed, expiring token; checked by _admin_denied on every admin endpoint
+            return jsonify(success=True, admin_token=issue_token(email, role="admin"))
         else:
             return jsonify(success=False, message="Invalid credentials")
     except Exception as e:
         print(f"admin_login error: {e}")
         return jsonify(success=False, message=str(e)), 500
 
+ADMIN_USERS_PAGE_SIZE = 50
+ADMIN_USERS_MAX_PAGE_SIZE = 500
+ADMIN_USER_SORTS = ("email", "username", "created_at", "records", "last_visit", "highest_risk")
+
 @app.route("/api/admin/users", methods=["POST"])
 def admin_get_users():
-    """Get all users for admin"""
+    """Get users for admin: paged, with optional prefix search (q), sort/order,
+    and per-user result stats (include_stats) from the user index"""
     try:
         data = request.get_json() or {}
         admin_token = data.get("admin_token", "")
         
         if not admin_token:
             return jsonify(success=False, message="Admin token required")
+        denied = _admin_denied(data)
+        if denied:
+            return denied
         
-        # In a real app, verify the token
-        users = get_users()
+        try:
+            page = max(1, int(data.get("page") or 1))
+            page_size = min(ADMIN_USERS_MAX_PAGE_SIZE, max(1, int(data.get("page_size") or ADMIN_USERS_PAGE_SIZE)))
+        except (TypeError, ValueError):
+            return jsonify(success=False, message="page and page_size must be integers"), 400
+        sort = data.get("sort") or "email"
+        if sort not in ADMIN_USER_SORTS:
+            return jsonify(success=False, message=f"sort must be one of {', '.join(ADMIN_USER_SORTS)}"), 400
+        descending = (data.get("order") or "asc").lower() == "desc"
+        include_stats = bool(data.get("include_stats")) or sort in ("records", "last_visit", "highest_risk")
+        
+        view = user_index.users_view()
+        q = (data.get("q") or "").strip()
+        emails = view.search(q) if q else view.emails  # both already sorted by email
+        index = user_index.load() if include_stats else None
+        
+        if sort != "email":
+            if sort == "username":
+                key = lambda e: user_index.display_name(e, view.users[e]).lower()
+            elif sort == "created_at":
+                key = lambda e: view.users[e].get("created_at") or ""
+            elif sort == "highest_risk":
+                key = lambda e: user_index.RISK_RANK.get((index["users"].get(e, {}).get("highest_risk") or "").lower(), 0)
+            else:
+                key = lambda e: index["users"].get(e, {}).get(sort) or (0 if sort == "records" else "")
+            emails = sorted(emails, key=key, reverse=descending)
+        elif descending:
+            emails = emails[::-1]
+        
+        total = len(emails)
+        start = (page - 1) * page_size
         user_list = []
-        for email, user_data in users.items():
-            user_list.append({
+        for email in emails[start:start + page_size]:
+            user_data = view.users[email]
+            item = {
                 "email": email,
-                "username": user_data.get("username") or user_data.get("name") or email,
+                "username": user_index.display_name(email, user_data),
                 "phone": user_data.get("phone", ""),
                 "address": user_data.get("address", ""),
                 "created_at": user_data.get("created_at", ""),
                 "verified": user_data.get("verified", False)
-            })
+            }
+            if include_stats:
+                item["stats"] = user_index.user_stats(index, email)
+            user_list.append(item)
         
-        return jsonify(success=True, users=user_list)
+        return jsonify(success=True, users=user_list, total=total, page=page, page_size=page_size,
+                       pages=(total + page_size - 1) // page_size)
     except Exception as e:
         print(f"admin_get_users error: {e}")
         return jsonify(success=False, message=str(e)), 500
@@ -1032,53 +1150,21 @@ def admin_get_user_results():
         
         if not admin_token or not email:
             return jsonify(success=False, message="Admin token and email required")
+        denied = _admin_denied(data)
+        if denied:
+            return denied
         
         # Get all results and filter by email
-        all_results = get_results_store()
         user_results = []
         
         # Results are stored as: {email: [{record1}, {record2}]}
-        if email in all_results:
-            records = all_results[email]
-            
-            # Fix duplicate Patient IDs
-            first_letter = email[0].lower() if email else "p"
-            assigned_ids = set()
-            next_id = 101
-            
-            # First pass: collect already assigned valid IDs
-            for record in records:
-                if record.get("patient_id"):
-                    id_str = record.get("patient_id", "")
-                    num_str = ''.join(filter(str.isdigit, id_str))
-                    if num_str:
-                        id_num = int(num_str)
-                        assigned_ids.add(id_num)
-                        next_id = max(next_id, id_num + 1)
-            
-            # Second pass: reassign duplicate IDs
-            seen_ids = {}
-            for record in records:
-                patient_id = record.get("patient_id")
-                if patient_id:
-                    num_str = ''.join(filter(str.isdigit, patient_id))
-                    if num_str:
-                        id_num = int(num_str)
-                        # Check if this ID was already assigned to another record
-                        if id_num in seen_ids:
-                            # This is a duplicate, assign new ID
-                            while next_id in assigned_ids:
-                                next_id += 1
-                            new_id = f"{first_letter}{next_id}"
-                            record["patient_id"] = new_id
-                            assigned_ids.add(next_id)
-                            next_id += 1
-                        else:
-                            seen_ids[id_num] = True
-            
-            # Save updated records
-            save_results_store(all_results)
-            
+        with lock:
+            all_results = get_results_store()
+            records = all_results.get(email)
+            if records and _dedupe_patient_ids(email, records):
+                save_results_store(all_results)
+        
+        if records:
             # Sort by Patient ID in increasing order
             records_sorted = sorted(records, key=lambda r: int(''.join(filter(str.isdigit, r.get("patient_id", "0")))) or 0)
             
@@ -1102,9 +1188,23 @@ def admin_get_user_results():
         print(f"admin_get_user_results error: {e}")
         return jsonify(success=False, message=str(e)), 500
 
+# Admin jobs (user deletion) run in the background; poll /api/admin/job-status
+# (job state is kept in SQLite, so any worker can answer the poll)
+admin_jobs = JobRunner()
+atexit.register(admin_jobs.shutdown)
+
+@on_user_deleted
+def _discard_otp(email, removed, store, results_before):
+    OTP_STORE.discard(email)
+
+def _delete_user_job(email):
+    existed, removed = delete_user(email)
+    return {"email": email, "user_existed": existed, "results_removed": len(removed)}
+
 @app.route("/api/admin/delete-user", methods=["POST"])
 def admin_delete_user():
-    """Delete a user and their results"""
+    """Delete a user and everything derived from them (results, OTP state, stats,
+    cached PDFs) as a background job; returns job_id for /api/admin/job-status"""
     try:
         data = request.get_json() or {}
         admin_token = data.get("admin_token", "")
@@ -1112,27 +1212,31 @@ def admin_delete_user():
         
         if not admin_token or not email:
             return jsonify(success=False, message="Admin token and email required")
+        denied = _admin_denied(data)
+        if denied:
+            return denied
         
-        # Delete user from users.json
-        users = get_users()
-        if email in users:
-            del users[email]
-            save_users(users)
-        
-        # Delete user's results from results.json
-        all_results = get_results_store()
-        if email in all_results:
-            del all_results[email]
-        save_results_store(all_results)
-        
-        return jsonify(success=True, message=f"User {email} and their results deleted")
+        job_id = admin_jobs.submit("delete_user", _delete_user_job, email)
+        return jsonify(success=True, job_id=job_id, message=f"Deleting user {email}"), 202
     except Exception as e:
         print(f"admin_delete_user error: {e}")
         return jsonify(success=False, message=str(e)), 500
 
+@app.route("/api/admin/job-status", methods=["POST"])
+def admin_job_status():
+    """State of a background admin job: queued, running, done or failed"""
+    data = request.get_json() or {}
+    denied = _admin_denied(data)
+    if denied:
+        return denied
+    job = admin_jobs.status((data.get("job_id") or "").strip())
+    if job is None:
+        return jsonify(success=False, message="Unknown job id"), 404
+    return jsonify(success=True, job=job)
+
 @app.route("/api/admin/user-results-pdf", methods=["POST"])
 def admin_user_results_pdf():
-    """Generate PDF of user results"""
+    """PDF of a user's results, rendered server-side and cached until their next save"""
     try:
         data = request.get_json() or {}
         admin_token = data.get("admin_token", "")
@@ -1140,25 +1244,203 @@ def admin_user_results_pdf():
         
         if not admin_token or not email:
             return jsonify(success=False, message="Admin token and email required"), 400
+        denied = _admin_denied(data)
+        if denied:
+            return denied
         
-        # Get user results
-        all_results = get_results_store()
-        user_results = []
+        path = results_pdf.user_results_pdf(email)
+        safe_name = "".join(ch if ch.isalnum() else "_" for ch in email)
+        return send_file(path, mimetype="application/pdf", as_attachment=True,
+                         download_name=f"user_history_{safe_name}.pdf", max_age=0)
+    except Exception as e:
+        print(f"admin_user_results_pdf error: {e}")
+        return jsonify(success=False, message=str(e)), 500
+
+@app.route("/api/admin/stats", methods=["POST"])
+def admin_stats():
+    """Result counts by disease, risk, age category, gender and day (optionally only the last `days` days)"""
+    try:
+        data = request.get_json() or {}
+        admin_token = data.get("admin_token", "")
         
-        if email in all_results:
-            for record in all_results[email]:
-                user_results.append(record)
+        if not admin_token:
+            return jsonify(success=False, message="Admin token required")
+        denied = _admin_denied(data)
+        if denied:
+            return denied
         
-        # For now, just return a JSON message (client will handle PDF generation)
-        return jsonify(success=True, message="PDF generation initiated on client", results=user_results)
+        try:
+            days = int(data.get("days") or 0)
+        except (TypeError, ValueError):
+            return jsonify(success=False, message="days must be an integer"), 400
+        if days < 0:
+            return jsonify(success=False, message="days must not be negative"), 400
+        
+        counters = analytics.load()
+        stats = {dim: counters[dim] for dim in analytics.DIMENSIONS}
+        if days:
+            try:
+                cutoff = (datetime.utcnow() - timedelta(days=days)).date().isoformat()
+            except OverflowError:
+                cutoff = ""   # before any date
+            stats["day"] = {day: n for day, n in counters["day"].items() if day != "unknown" and day >= cutoff}
+        return jsonify(success=True, total=counters["total"], stats=stats)
     except Exception as e:
-        print(f"admin_user_results_pdf error: {e}")
+        print(f"admin_stats error: {e}")
         return jsonify(success=False, message=str(e)), 500
 
+@app.route("/api/admin/export", methods=["POST"])
+def admin_export():
+    """Stream all saved results as csv, jsonl or parquet, optionally filtered by
+    since/until (YYYY-MM-DD), disease, risk (comma-separated) and email"""
+    try:
+        data = request.get_json() or {}
+        admin_token = data.get("admin_token", "")
+        
+        if not admin_token:
+            return jsonify(success=False, message="Admin token required")
+        denied = _admin_denied(data)
+        if denied:
+            return denied
+        
+        fmt = (data.get("format") or "csv").lower()
+        if fmt not in export_results.FORMATS:
+            return jsonify(success=False, message=f"format must be one of {', '.join(sorted(export_results.FORMATS))}"), 400
+        keep = export_results.make_filter(data.get("since"), data.get("until"), data.get("disease"),
+                                          data.get("risk"), data.get("email"))
+        filename = f"results_export_{datetime.utcnow():%Y%m%d_%H%M%S}.{fmt}"
+        
+        if fmt == "parquet":
+            # Parquet's footer comes last, so it is built in a temp file (one row group at a time) and then sent
+            fd, path = tempfile.mkstemp(suffix=".parquet")
+            os.close(fd)
+            try:
+                export_results.write_parquet(export_results.iter_rows(keep), path)
+                resp = send_file(path, mimetype=export_results.FORMATS[fmt], as_attachment=True, download_name=filename)
+            except BaseException:
+                os.remove(path)
+                raise
+            resp.call_on_close(lambda: os.remove(path))
+            return resp
+        
+        encode = export_results.csv_chunks if fmt == "csv" else export_results.jsonl_chunks
+        # No Content-Length: the body goes out with chunked transfer encoding as it is generated
+        return Response(stream_with_context(encode(export_results.iter_rows(keep))),
+                        mimetype=export_results.FORMATS[fmt],
+                        headers={"Content-Disposition": f"attachment; filename={filename}"})
+    except export_results.ExportError as e:
+        return jsonify(success=False, message=str(e)), 400
+    except Exception as e:
+        print(f"admin_export error: {e}")
+        return jsonify(success=False, message=str(e)), 500
+
+@app.route("/api/admin/reload-kb", methods=["POST"])
+def admin_reload_kb():
+    """Reload the recommendation knowledge base from disk (atomic swap)"""
+    try:
+        data = request.get_json() or {}
+        admin_token = data.get("admin_token", "")
+        
+        if not admin_token:
+            return jsonify(success=False, message="Admin token required")
+        denied = _admin_denied(data)
+        if denied:
+            return denied
+        
+        previous = knowledge_base.active().version
+        kb = knowledge_base.reload(force=True)
+        return jsonify(success=True, previous_version=previous, kb_version=kb.version)
+    except knowledge_base.KnowledgeBaseError as e:
+        return jsonify(success=False, message=f"Invalid knowledge base, keeping current version: {e}"), 400
+    except Exception as e:
+        print(f"admin_reload_kb error: {e}")
+        return jsonify(success=False, message=str(e)), 500
+
+@app.route("/api/admin/profile/start", methods=["POST"])
+def admin_profile_start():
+    """Start a sampling-profiler session: sample_rate (fraction of requests),
+    endpoints, interval_ms and duration_seconds are optional"""
+    data = request.get_json() or {}
+    denied = _admin_denied(data)
+    if denied:
+        return denied
+    workers = profiler.worker_count()
+    if workers > 1:
+        return jsonify(success=False, message=f"Profiling needs a single worker process (running {workers}); "
+                                              "samples are per process. Restart with WEB_CONCURRENCY=1 to profile."), 409
+    try:
+        status = profiler.sampler.start(sample_rate=float(data.get("sample_rate", 0.1)),
+                                        endpoints=data.get("endpoints") or profiler.PROFILE_DEFAULT_ENDPOINTS,
+                                        interval=float(data.get("interval_ms", 5)) / 1000,
+                                        duration=float(data.get("duration_seconds", 60)))
+    except (TypeError, ValueError) as e:
+        return jsonify(success=False, message=str(e)), 400
+    return jsonify(success=True, profile=status)
+
+@app.route("/api/admin/profile/stop", methods=["POST"])
+def admin_profile_stop():
+    """Stop the profiling session (its samples stay downloadable)"""
+    data = request.get_json() or {}
+    denied = _admin_denied(data)
+    if denied:
+        return denied
+    return jsonify(success=True, profile=profiler.sampler.stop())
+
+@app.route("/api/admin/profile/status", methods=["POST"])
+def admin_profile_status():
+    data = request.get_json() or {}
+    denied = _admin_denied(data)
+    if denied:
+        return denied
+    return jsonify(success=True, profile=profiler.sampler.status())
+
+@app.route("/api/admin/profile/download", methods=["POST"])
+def admin_profile_download():
+    """Samples of the last session as collapsed stacks (flamegraph.pl / speedscope input)"""
+    data = request.get_json() or {}
+    denied = _admin_denied(data)
+    if denied:
+        return denied
+    name = "profile-" + datetime.utcnow().strftime("%Y%m%d-%H%M%S") + ".folded"
+    return Response(profiler.sampler.collapsed(), mimetype="text/plain",
+                    headers={"Content-Disposition": f'attachment; filename="{name}"'})
+
 # ==================== END ADMIN ENDPOINTS ====================
 
-# ---------------- Run ----------------
+# ---------------- App factory / serving ----------------
+# Modules only some endpoints need; importing them is deferred to first use
+# and done here ahead of time when warming up
+WARM_UP_IMPORTS = ("PyPDF2", "reportlab.platypus")
+
+def warm_up():
+    """Load everything the first request would otherwise pay for (deferred
+    imports, ML model, knowledge base, baby-thinking table, dataset,
+    compressed static assets). Called by create_app unless APP_WARM_UP=0, so
+    under gunicorn with preload_app it runs once in the master before forking;
+    short-lived workers can skip it and load each piece on first use."""
+    for name in WARM_UP_IMPORTS:
+        importlib.import_module(name)
+    load_model()
+    knowledge_base.active()
+    build_thinking_table()
+    _load_dataset()
+    static_assets.load()
+
+def after_fork():
+    """Per-worker reset after a pre-forking server forks (gunicorn post_fork)."""
+    OTP_STORE.after_fork()
+    admin_jobs.after_fork()
+
+def create_app(config=None):
+    """Configured (and by default warmed-up) application for WSGI servers (see wsgi.py)."""
+    if config:
+        app.config.update(config)
+    if app.config["WARM_UP"]:
+        warm_up()
+    return app
+
 if __name__ == "__main__":
+    # Development server only; in production run `gunicorn -c gunicorn.conf.py wsgi:app`
     port = int(os.environ.get("PORT", "5000"))
     # If testing from same machine/browser, 127.0.0.1 is fine
-    app.run(host="127.0.0.1", port=port, debug=True)
+    create_app().run(host=os.environ.get("HOST", "127.0.0.1"), port=port, debug=app.config["DEBUG"])
@@ -0,0 +1,251 @@
+# asgi.py
+# asyncio serving path:  WEB_CONCURRENCY=N uvicorn asgi:app
+#
+# The slow endpoints are served natively on the event loop so a worker can keep
+# thousands of slow clients (uploads, mobile links) in flight without holding a
+# thread per connection:
+#   /api/predict          Jaccard k-NN scoring runs on the thread pool
+#   /api/analyze-reports  the multipart body is read asynchronously and each PDF
+#                         is extracted/classified in a worker process, in parallel
+#   /api/send-otp         the OTP store write runs on the thread pool; delivery
+#                         goes through the mail queue exactly as under WSGI
+# The response bodies come from the same functions the Flask views use
+# (app.predict, app.analyze_uploads, app.issue_otp) and are encoded and
+# compressed by responses.py as under WSGI, so the contracts are identical. Every other route, and any
+# request the fast path does not recognise (bad JSON, wrong method, ...), is
+# handed to the Flask app through a small WSGI bridge on the thread pool.
+import asyncio, io, multiprocessing, os, sys, threading, time, traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from werkzeug.datastructures import Accept
+from werkzeug.exceptions import InternalServerError
+from werkzeug.http import parse_accept_header
+from werkzeug.wrappers import Request
+
+import app as medpredict
+from metrics import registry, stage
+from profiler import sampler
+from report_parser import extract_and_classify
+from responses import compress_response
+
+ASGI_THREADS = int(os.environ.get("ASGI_THREADS", "32"))   # blocking work + bridged Flask requests
+ASGI_PDF_WORKERS = int(os.environ.get("ASGI_PDF_WORKERS", str(os.cpu_count() or 1)))  # 0 = parse on the thread pool
+ASGI_START_METHOD = os.environ.get("ASGI_START_METHOD") or None   # fork/spawn/forkserver
+
+
+class MedPredictASGI:
+    def __init__(self, flask_app, threads=ASGI_THREADS, pdf_workers=ASGI_PDF_WORKERS, start_method=ASGI_START_METHOD):
+        self.flask_app = flask_app
+        self.threads = ThreadPoolExecutor(max(1, threads), thread_name_prefix="asgi")
+        self.pdf_workers = pdf_workers
+        self.start_method = start_method
+        self._pdf_pool = None
+        self._pdf_lock = threading.Lock()
+        self.routes = {
+            "/api/predict": self.predict,
+            "/api/analyze-reports": self.analyze_reports,
+            "/api/send-otp": self.send_otp,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+        handler = self.routes.get(scope["path"]) if scope["method"] == "POST" else None
+        body = await _read_body(receive)
+        if handler is not None:
+            started = time.perf_counter()
+            registry.request_started(scope["path"])
+            resp = None
+            try:
+                payload = await handler(scope, body)
+            except Exception:
+                traceback.print_exc()
+                resp = InternalServerError().get_response()   # what Flask answers for an unhandled error
+            else:
+                resp = self.flask_app.json.response(payload) if payload is not None else None
+            finally:
+                if resp is not None:
+                    registry.request_finished(scope["path"], "POST", resp.status_code, time.perf_counter() - started)
+                else:
+                    registry.request_abandoned(scope["path"])   # handed on to Flask, which times it itself
+            if resp is not None:
+                compress_response(resp, _accept_encodings(scope))
+                await _start(send, resp.status_code, resp.headers.to_wsgi_list())
+                return await send({"type": "http.response.body", "body": resp.get_data()})
+        await self._wsgi(scope, body, send)
+
+    # ---------------- native endpoints ----------------
+    # Each returns the response body, or None to let Flask handle the request.
+    async def _run(self, fn, *args, endpoint=None):
+        if endpoint is not None and sampler.should_sample(endpoint):
+            fn = sampler.traced(endpoint, fn)
+        return await asyncio.get_running_loop().run_in_executor(self.threads, fn, *args)
+
+    async def predict(self, scope, body):
+        data = _json_body(body)
+        if data is None:
+            return None
+        return await self._run(medpredict.predict, data, endpoint=scope["path"])
+
+    async def send_otp(self, scope, body):
+        data = _json_body(body)
+        if data is None:
+            return None
+        return await self._run(medpredict.issue_otp, data.get("email"))
+
+    async def analyze_reports(self, scope, body):
+        form, files = await self._run(_parse_form, _environ(scope, body))
+        tests_raw = (form.get("tests") or "").strip()
+        if not tests_raw:
+            return dict(success=False, message="No tests provided.")
+        tests = medpredict.requested_tests(tests_raw)
+        uploads = {key: files.get(f"file_{key}") for key in tests}
+        auto_uploads = files.getlist("file_auto")
+
+        wanted = [f for f in uploads.values() if f] + auto_uploads
+        extracted = await asyncio.gather(*(self._extract(f.read()) for f in wanted), return_exceptions=True)
+        results = {id(f): r for f, r in zip(wanted, extracted)}
+
+        def extract(f):
+            result = results[id(f)]
+            if isinstance(result, BaseException):
+                raise result
+            return result
+        return await self._run(medpredict.analyze_uploads, tests, uploads, auto_uploads, extract, endpoint=scope["path"])
+
+    async def _extract(self, data):
+        pool = self._pdfs() or self.threads
+        with stage("pdf_extract"):   # wall time, including any wait for a free worker
+            return await asyncio.get_running_loop().run_in_executor(pool, extract_and_classify, io.BytesIO(data))
+
+    def _pdfs(self):
+        if self.pdf_workers <= 0:
+            return None
+        with self._pdf_lock:
+            if self._pdf_pool is None:
+                ctx = multiprocessing.get_context(self.start_method)
+                self._pdf_pool = ProcessPoolExecutor(self.pdf_workers, mp_context=ctx)
+            return self._pdf_pool
+
+    # ---------------- WSGI bridge ----------------
+    async def _wsgi(self, scope, body, send):
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = headers
+
+        def next_chunk(it):
+            for chunk in it:
+                if chunk:
+                    return chunk
+            return None
+
+        environ = _environ(scope, body)
+        result = await self._run(self.flask_app, environ, start_response)
+        try:
+            it = iter(result)
+            first = await self._run(next_chunk, it)
+            await _start(send, started["status"], started["headers"])
+            # Streamed responses (exports, baby-thinking events) go out chunk by chunk
+            chunk = first
+            while chunk is not None:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                chunk = await self._run(next_chunk, it)
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            if hasattr(result, "close"):
+                await self._run(result.close)
+
+    # ---------------- lifespan ----------------
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def shutdown(self):
+        with self._pdf_lock:
+            pool, self._pdf_pool = self._pdf_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+        self.threads.shutdown(wait=False)
+
+
+async def _read_body(receive):
+    parts = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        parts.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(parts)
+
+
+async def _start(send, status, headers):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]})
+
+
+def _accept_encodings(scope):
+    values = [v.decode("latin-1") for k, v in scope.get("headers", []) if k.lower() == b"accept-encoding"]
+    return parse_accept_header(",".join(values), Accept)
+
+
+def _json_body(body):
+    """The request's JSON object, or None when Flask's own handling (errors
+    included) should answer instead."""
+    try:
+        data = medpredict.app.json.loads(body)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _parse_form(environ):
+    request = Request(environ)
+    return request.form, request.files
+
+
+def _environ(scope, body):
+    """WSGI environ for an ASGI http scope with an already-read body."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name != "CONTENT_LENGTH":
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+app = MedPredictASGI(medpredict.create_app())
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+bench_endpoints.py
+
+End-to-end latency, throughput and memory of the API endpoints, driven through
+Flask's test client (no network, no server) against synthetic data from
+synthetic_data.py.
+
+Scenarios (each in a fresh interpreter, so peak RSS is per endpoint):
+  predict             /api/predict with 3-5 random symptoms and an age
+  analyze-report      /api/analyze-reports, one PDF sent as file_<test>
+  analyze-batch       /api/analyze-reports, --pdfs-per-request PDFs as file_auto
+  get-results         /api/get-results for the heavy user (--heavy-user-results)
+  admin-user-results  /api/admin/user-results for the heavy user
+  admin-users         /api/admin/users, first page with per-user stats
+  admin-stats         /api/admin/stats
+  save-result         /api/save-result for random users (appends to results.json)
+
+Requests run one after another from a single thread, after --warmup untimed
+requests; requests/s is 1 / mean latency. Responses are requested with
+Accept-Encoding: gzip, as browsers send it, so compression is included. Peak
+RSS is the worker's ru_maxrss (the interpreter, the app and the data it
+loaded). Workers run in a scratch copy of the data directory, so save-result
+never touches the source data.
+
+Results are compared against a JSON baseline (default benchmarks/baseline.json):
+changes beyond --threshold percent are marked, and --check exits 1 if any
+metric regressed. --save-baseline writes the current run as the new baseline;
+commit it alongside the change that moved the numbers. Baselines are only
+comparable at the same scale and on similar hardware (both are recorded).
+
+Usage:
+    python benchmarks/bench_endpoints.py [--data DIR] [--dataset-records N] [--users N]
+        [--results-per-user N] [--heavy-user-results N] [--requests N] [--warmup N]
+        [--scenarios a,b] [--baseline PATH] [--save-baseline] [--threshold PCT] [--check]
+"""
+import argparse
+import gzip
+import io
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+sys.path.insert(0, HERE)
+
+import synthetic_data
+
+SCENARIOS = ("predict", "analyze-report", "analyze-batch", "get-results", "admin-user-results",
+             "admin-users", "admin-stats", "save-result")   # save-result last: it grows results.json
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+# metric -> True if higher is better
+METRICS = {"throughput_rps": True, "p50_ms": False, "p99_ms": False, "peak_rss_mb": False}
+
+
+# ---------------- worker (one scenario, cwd = scratch data dir) ----------------
+def _scenario(name, client, rng, pdfs_per_request):
+    """A zero-argument function sending one request for scenario `name`."""
+    import session_tokens
+    heavy = synthetic_data.email_for(0)
+    user_token = session_tokens.issue_token(heavy)
+    admin_token = session_tokens.issue_token("admin@bench.example", role="admin")
+    headers = {"Accept-Encoding": "gzip"}
+
+    def post(path, **kwargs):
+        return lambda: client.post(path, headers=headers, **kwargs)
+
+    if name == "predict":
+        with open("dataset.json", encoding="utf-8") as f:
+            vocab = sorted({s for r in json.load(f) for s in r.get("symptoms") or []})
+        return lambda: client.post("/api/predict", headers=headers, json={
+            "symptoms": rng.sample(vocab, min(len(vocab), rng.randint(3, 5))),
+            "patient": {"age": rng.randint(1, 80)}})
+    if name in ("analyze-report", "analyze-batch"):
+        with open(os.path.join("reports", "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        pdfs = []
+        for entry in manifest:
+            with open(os.path.join("reports", entry["file"]), "rb") as f:
+                pdfs.append((entry["test"], entry["file"], f.read()))
+
+        def analyze():
+            if name == "analyze-report":
+                test, filename, body = rng.choice(pdfs)
+                form = {"tests": test, f"file_{test}": (io.BytesIO(body), filename)}
+            else:
+                batch = rng.sample(pdfs, min(len(pdfs), pdfs_per_request))
+                form = {"tests": ",".join(sorted({test for test, _, _ in batch})),
+                        "file_auto": [(io.BytesIO(body), filename) for _, filename, body in batch]}
+            return client.post("/api/analyze-reports", headers=headers, data=form,
+                               content_type="multipart/form-data")
+        return analyze
+    if name == "get-results":
+        return post("/api/get-results", json={"token": user_token})
+    if name == "admin-user-results":
+        return post("/api/admin/user-results", json={"admin_token": admin_token, "email": heavy})
+    if name == "admin-users":
+        return post("/api/admin/users", json={"admin_token": admin_token, "include_stats": True})
+    if name == "admin-stats":
+        return post("/api/admin/stats", json={"admin_token": admin_token})
+    if name == "save-result":
+        with open("users.json", encoding="utf-8") as f:
+            emails = sorted(json.load(f))
+        tokens = {}
+
+        def save():
+            email = rng.choice(emails)
+            token = tokens.get(email) or tokens.setdefault(email, session_tokens.issue_token(email))
+            stamp = time.strftime("%d/%m/%Y, %H:%M:%S")
+            return client.post("/api/save-result", headers=headers, json={
+                "token": token, "timestamp": stamp, "client_key": f"{stamp}|bench|{rng.random()}",
+                "patient_name": "Bench Patient", "patient_age": rng.randint(1, 80), "patient_gender": "Female",
+                "disease": "Dengue", "risk": "Moderate",
+                "recommendations": ["Rest", "Fluids", "Follow up in 3 days"], "report_scores": {"cbc": 4}})
+        return save
+    raise SystemExit(f"unknown scenario: {name}")
+
+
+def _percentile(sorted_values, pct):
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+def run_worker(name, requests, warmup, pdfs_per_request, seed):
+    import resource
+    sys.path.insert(0, ROOT)
+    import app
+    app.warm_up()
+    client = app.app.test_client()
+    send = _scenario(name, client, random.Random(seed), pdfs_per_request)
+
+    for _ in range(warmup):
+        send()
+    latencies, errors, body_bytes = [], 0, 0
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = send()
+        latencies.append(time.perf_counter() - started)
+        body = response.get_data()
+        body_bytes += len(body)
+        if response.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        if response.status_code != 200 or b'"success":false' in body:
+            errors += 1
+
+    latencies.sort()
+    mean = sum(latencies) / len(latencies)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(1 / mean, 1),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(mean * 1000, 3),
+        "response_bytes": body_bytes // requests,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),   # KiB on Linux
+    }
+
+
+# ---------------- driver ----------------
+def run_scenario(name, workdir, args):
+    env = dict(os.environ, SESSION_SECRET="bench-endpoints", APP_WARM_UP="0")
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", name, "--requests", str(args.requests),
+           "--warmup", str(args.warmup), "--pdfs-per-request", str(args.pdfs_per_request), "--seed", str(args.seed)]
+    proc = subprocess.run(cmd, cwd=workdir, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stdout + proc.stderr)
+        raise SystemExit(f"scenario {name} failed (exit {proc.returncode})")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, threshold):
+    """Print each metric next to the baseline; returns the regressed (scenario, metric) pairs."""
+    regressions = []
+    print(f"\n{'vs baseline':<20}" + "".join(f"{m:>22}" for m in METRICS))
+    for name, current in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        cells = []
+        for metric, higher_is_better in METRICS.items():
+            old, new = before.get(metric), current.get(metric)
+            if not old:
+                cells.append(f"{'n/a':>22}")
+                continue
+            change = (new - old) / old * 100
+            worse = -change if higher_is_better else change
+            mark = " !" if worse > threshold else ("  " if abs(change) <= threshold else " +")
+            if worse > threshold:
+                regressions.append((name, metric))
+            cells.append(f"{old:>9g} -> {new:<9g}{mark}")
+        print(f"{name:<20}" + "".join(cells))
+    print(f"(! = worse by more than {threshold:g}%, + = better by more than {threshold:g}%)")
+    return regressions
+
+
+def environment():
+    return {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine(),
+            "cpu_count": os.cpu_count()}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--worker", help=argparse.SUPPRESS)
+    ap.add_argument("--data", help="existing synthetic_data.py output (default: generate into a temp dir)")
+    ap.add_argument("--dataset-records", type=int, default=1000)
+    ap.add_argument("--users", type=int, default=100)
+    ap.add_argument("--results-per-user", type=int, default=20)
+    ap.add_argument("--heavy-user-results", type=int, default=1000)
+    ap.add_argument("--pdfs", type=int, default=26, help="report PDFs to generate")
+    ap.add_argument("--pdfs-per-request", type=int, default=4)
+    ap.add_argument("--requests", type=int, default=200, help="timed requests per scenario")
+    ap.add_argument("--warmup", type=int, default=10, help="untimed requests per scenario")
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--baseline", default=DEFAULT_BASELINE)
+    ap.add_argument("--save-baseline", action="store_true", help="write this run to --baseline")
+    ap.add_argument("--threshold", type=float, default=20.0, help="percent change reported as a regression")
+    ap.add_argument("--check", action="store_true", help="exit 1 if any metric regressed past --threshold")
+    args = ap.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.requests, args.warmup, args.pdfs_per_request, args.seed)))
+        return 0
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = sorted(set(names) - set(SCENARIOS))
+    if unknown:
+        ap.error(f"unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+
+    with tempfile.TemporaryDirectory(prefix="bench-endpoints-") as tmp:
+        source = args.data
+        if source:
+            with open(os.path.join(source, "scale.json"), encoding="utf-8") as f:
+                scale = json.load(f)
+        else:
+            source = os.path.join(tmp, "data")
+            print("generating synthetic data ...", flush=True)
+            scale = synthetic_data.generate(source, args.dataset_records, args.users, args.results_per_user,
+                                            args.heavy_user_results, args.pdfs, args.seed)
+        scale = dict(scale, pdfs_per_request=args.pdfs_per_request)
+
+        results = {}
+        print(f"{'scenario':<20}{'req/s':>9}{'p50 ms':>10}{'p99 ms':>10}{'RSS MB':>9}{'resp B':>10}{'errors':>8}")
+        for name in names:
+            workdir = os.path.join(tmp, "run")
+            shutil.rmtree(workdir, ignore_errors=True)
+            shutil.copytree(source, workdir)
+            r = results[name] = run_scenario(name, workdir, args)
+            print(f"{name:<20}{r['throughput_rps']:>9.1f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+                  f"{r['peak_rss_mb']:>9.1f}{r['response_bytes']:>10}{r['errors']:>8}", flush=True)
+
+    run = {"environment": environment(), "scale": scale, "requests": args.requests, "warmup": args.warmup,
+           "results": results}
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != scale:
+            print("\nnote: baseline was recorded at a different scale; deltas are not comparable")
+        regressions = compare(results, baseline, args.threshold)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nbaseline written to {args.baseline}")
+    if any(r["errors"] for r in results.values()):
+        print("\nwarning: some requests failed; see the errors column")
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+bench_infant_recommendations.py
+
+Per-call time and allocation cost of get_month_specific_infant_recommendations.
+
+MONTH_SPECIFIC used to be a dict literal inside the function, so every call
+rebuilt the whole nested table. That cost is reproduced here by thawing the
+frozen table into fresh dicts/lists before the lookup (the same objects the
+literal allocated), and compared against the current module-level lookup.
+
+Usage:
+    python benchmarks/bench_infant_recommendations.py [--calls N]
+"""
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from age_specific_recommendations import (  # noqa: E402
+    MONTH_SPECIFIC, get_month_specific_infant_recommendations, thaw, _month_range,
+)
+
+SYMPTOMS = ["fever", "cough", "cold", "rash"]
+
+
+def rebuild_per_call(symptom, months):
+    """Old behaviour: build the table, then look up the protocol."""
+    table = thaw(MONTH_SPECIFIC)
+    return table.get(symptom, {}).get(_month_range(months), {})
+
+
+def workload(fn):
+    for symptom in SYMPTOMS:
+        for months in range(13):
+            fn(symptom, months)
+
+
+def allocated_per_call(fn):
+    """Bytes allocated (peak) by one call, measured with tracemalloc."""
+    fn("fever", 4)  # warm up
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    fn("fever", 4)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--calls", type=int, default=200, help="workload repetitions (52 lookups each)")
+    args = ap.parse_args(argv)
+
+    lookups = args.calls * len(SYMPTOMS) * 13
+    print(f"{'variant':<22}{'us/call':>10}{'bytes/call':>12}")
+    for name, fn in (("rebuild per call", rebuild_per_call),
+                     ("module-level table", get_month_specific_infant_recommendations)):
+        seconds = timeit.timeit(lambda: workload(fn), number=args.calls)
+        print(f"{name:<22}{seconds / lookups * 1e6:>10.2f}{allocated_per_call(fn):>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+bench_startup.py
+
+Cold-start cost of the server, per subsystem, from `python -X importtime`.
+
+Each phase runs in a fresh interpreter (so nothing is cached in-process):
+  import       `import app` only (heavy modules are deferred to first use)
+  first-login  import + one /api/login request through the test client
+  warm-up      import + app.warm_up() (what create_app does by default)
+
+Import self-times are summed per subsystem (flask stack, PyPDF2, reportlab,
+joblib/scikit-learn, project modules, everything else) and the median over
+--runs runs is printed next to the wall-clock time of the phase.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+SUBSYSTEMS = (
+    ("flask", ("flask", "werkzeug", "jinja2", "markupsafe", "itsdangerous", "click", "blinker")),
+    ("PyPDF2", ("PyPDF2",)),
+    ("reportlab", ("reportlab", "PIL")),
+    ("joblib/sklearn", ("joblib", "sklearn", "numpy", "scipy", "threadpoolctl")),
+    ("orjson", ("orjson",)),
+)
+PROJECT = {name[:-3] for name in os.listdir(ROOT) if name.endswith(".py")}
+
+PHASES = {
+    "import": "import app",
+    "first-login": "import app\n"
+                   "r = app.app.test_client().post('/api/login', json={'email': 'nobody@example.com', 'password': 'x'})\n"
+                   "assert r.status_code < 500",
+    "warm-up": "import app\napp.warm_up()",
+}
+
+CHILD = """
+import json, sys, time
+t = time.perf_counter()
+exec(compile(sys.argv[1], "<phase>", "exec"))
+print(json.dumps({"wall_ms": (time.perf_counter() - t) * 1000}))
+"""
+
+
+def subsystem(module):
+    top = module.strip().split(".")[0]
+    for name, packages in SUBSYSTEMS:
+        if top in packages:
+            return name
+    return "project" if top in PROJECT else "other"
+
+
+def run_phase(code):
+    """(wall ms, {subsystem: import self ms}) for one fresh interpreter."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD, code],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    totals = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative, module = line[len("import time:"):].split("|")
+        key = subsystem(module)
+        totals[key] = totals.get(key, 0.0) + int(self_us) / 1000
+    wall = json.loads(proc.stdout.strip().splitlines()[-1])["wall_ms"]
+    return wall, totals
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5, help="fresh interpreters per phase (median reported)")
+    args = ap.parse_args(argv)
+
+    columns = [name for name, _ in SUBSYSTEMS] + ["project", "other"]
+    print(f"{'phase':<13}{'wall ms':>9}" + "".join(f"{c:>16}" for c in columns))
+    for phase, code in PHASES.items():
+        runs = [run_phase(code) for _ in range(args.runs)]
+        wall = statistics.median(w for w, _ in runs)
+        cells = [statistics.median(t.get(c, 0.0) for _, t in runs) for c in columns]
+        print(f"{phase:<13}{wall:>9.1f}" + "".join(f"{v:>16.1f}" for v in cells))
+    print("(subsystem columns: summed import self-time in ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
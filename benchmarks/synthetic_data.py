@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+synthetic_data.py
+
+Synthetic data for the endpoint benchmarks, written to a separate directory
+(never the project's own users.json / results.json):
+
+  dataset.json   --dataset-records k-NN records (10^3 - 10^6), derived from the
+                 real dataset.json: each record is a real disease with its
+                 symptoms, one dropped and up to two others added at random
+  users.json     --users accounts (10^2 - 10^5), all with password BENCH_PASSWORD
+  results.json   --results-per-user saved results per user, in the shape
+                 save-result writes (browser-locale timestamps, recommendation
+                 lists, report scores); user 0 gets --heavy-user-results
+  reports/       --pdfs lab-report PDFs, rendered by generate_risk_reports.py
+                 (one per report type) and copied round-robin; manifest.json
+                 maps each file to its test key
+  scale.json     the options used (read back by bench_endpoints.py --data)
+
+Output is deterministic for a given --seed. dataset.json and results.json are
+written record by record, so memory stays small at any scale.
+
+Usage:
+    python benchmarks/synthetic_data.py OUT_DIR [--dataset-records N] [--users N]
+        [--results-per-user N] [--heavy-user-results N] [--pdfs N] [--seed N]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+BENCH_PASSWORD = "bench-password"
+
+# generate_risk_reports.py function -> the test key it renders a report for
+REPORTS = {
+    "create_cbc_low_risk": "cbc", "create_cbc_medium_risk": "cbc", "create_cbc_high_risk": "cbc",
+    "create_blood_sugar_low_risk": "blood_sugar", "create_blood_sugar_medium_risk": "blood_sugar",
+    "create_blood_sugar_high_risk": "blood_sugar",
+    "create_kidney_low_risk": "kidney_function", "create_kidney_medium_risk": "kidney_function",
+    "create_kidney_high_risk": "kidney_function",
+    "create_dengue_positive": "dengue_ns1", "create_malaria_positive": "malaria_test",
+    "create_ecg_normal": "ecg", "create_ecg_abnormal": "ecg",
+}
+RISKS = ("Low", "Moderate", "High", "")
+GENDERS = ("Male", "Female", "Other")
+NAMES = ("Asha", "Ravi", "Meera", "Kiran", "Divya", "Arjun", "Lakshmi", "Suresh", "Priya", "Vikram")
+
+
+def email_for(i):
+    return f"user{i:06d}@bench.example"
+
+
+def _write_json_array(path, items):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for n, item in enumerate(items):
+            f.write(",\n" if n else "\n")
+            f.write(json.dumps(item, ensure_ascii=False))
+        f.write("\n]\n")
+
+
+def dataset_records(count, rng):
+    with open(os.path.join(ROOT, "dataset.json"), encoding="utf-8") as f:
+        base = json.load(f)
+    vocab = sorted({s for r in base for s in r.get("symptoms") or []})
+    for _ in range(count):
+        src = rng.choice(base)
+        symptoms = list(src.get("symptoms") or [])
+        if len(symptoms) > 1:
+            symptoms.pop(rng.randrange(len(symptoms)))
+        for extra in rng.sample(vocab, rng.randint(0, min(2, len(vocab)))):
+            if extra not in symptoms:
+                symptoms.append(extra)
+        yield {"symptoms": symptoms, "disease": src.get("disease")}
+
+
+def _timestamp(when, rng):
+    if rng.random() < 0.5:
+        return f"{when.day}/{when.month}/{when.year}, {when.hour % 12 or 12}:{when:%M:%S} {'am' if when.hour < 12 else 'pm'}"
+    return when.strftime("%d/%m/%Y, %H:%M:%S")
+
+
+def result_record(email, n, rng, diseases, start):
+    when = start + timedelta(minutes=rng.randrange(60 * 24 * 365))
+    disease = rng.choice(diseases)
+    stamp = _timestamp(when, rng)
+    age = rng.randint(0, 85)
+    return {
+        "email": email,
+        "timestamp": stamp,
+        "client_key": f"{stamp}|{disease}|{n}",
+        "patient_name": f"{rng.choice(NAMES)} {chr(65 + n % 26)}",
+        "patient_age": age,
+        "patient_gender": rng.choice(GENDERS),
+        "disease": disease,
+        "risk": rng.choice(RISKS),
+        "recommendations": [f"Advice {k}: rest, fluids and follow-up for {disease.lower()}." for k in range(rng.randint(6, 12))],
+        "report_scores": {"cbc": rng.randint(0, 10), "blood_sugar": rng.randint(0, 10)},
+        "patient_id": f"{email[0].upper()}{101 + n}",
+    }
+
+
+def write_results(path, users, per_user, heavy, rng):
+    with open(os.path.join(ROOT, "dataset.json"), encoding="utf-8") as f:
+        diseases = sorted({r.get("disease") or "Unknown" for r in json.load(f)})
+    start = datetime(2025, 1, 1)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for i in range(users):
+            email = email_for(i)
+            records = [result_record(email, n, rng, diseases, start) for n in range(heavy if i == 0 else per_user)]
+            f.write(",\n" if i else "\n")
+            f.write(f"{json.dumps(email)}: {json.dumps(records, ensure_ascii=False)}")
+        f.write("\n}\n")
+
+
+def write_users(path, users):
+    from werkzeug.security import generate_password_hash
+    password_hash = generate_password_hash(BENCH_PASSWORD)   # once: scrypt is deliberately slow
+    created = datetime(2025, 1, 1).isoformat()
+    data = {email_for(i): {"email": email_for(i), "password_hash": password_hash, "username": f"Bench User {i}",
+                           "phone": f"9{i:09d}", "address": "Bench City", "created_at": created, "verified": True}
+            for i in range(users)}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def write_reports(out_dir, count):
+    """`count` report PDFs in out_dir/reports; returns [{file, test}]."""
+    import generate_risk_reports
+    reports_dir = os.path.join(out_dir, "reports")
+    os.makedirs(reports_dir, exist_ok=True)
+    rendered = []
+    with tempfile.TemporaryDirectory() as tmp:
+        generate_risk_reports.OUTPUT_FOLDER = tmp
+        with contextlib.redirect_stdout(io.StringIO()):
+            for fn_name, test in REPORTS.items():
+                before = set(os.listdir(tmp))
+                getattr(generate_risk_reports, fn_name)()
+                for name in sorted(set(os.listdir(tmp)) - before):
+                    rendered.append((os.path.join(tmp, name), test))
+        manifest = []
+        for i in range(count):
+            src, test = rendered[i % len(rendered)]
+            name = f"{i:05d}_{os.path.basename(src)}"
+            shutil.copyfile(src, os.path.join(reports_dir, name))
+            manifest.append({"file": name, "test": test})
+    with open(os.path.join(reports_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def generate(out_dir, dataset_records_count=1000, users=100, results_per_user=20, heavy_user_results=1000,
+             pdfs=26, seed=1):
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    _write_json_array(os.path.join(out_dir, "dataset.json"), dataset_records(dataset_records_count, rng))
+    write_users(os.path.join(out_dir, "users.json"), users)
+    write_results(os.path.join(out_dir, "results.json"), users, results_per_user, heavy_user_results, rng)
+    write_reports(out_dir, pdfs)
+    for derived in ("user_index.json", "analytics.json"):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(out_dir, derived))   # stale once results.json changes
+    scale = {"dataset_records": dataset_records_count, "users": users, "results_per_user": results_per_user,
+             "heavy_user_results": heavy_user_results, "pdfs": pdfs, "seed": seed}
+    with open(os.path.join(out_dir, "scale.json"), "w", encoding="utf-8") as f:
+        json.dump(scale, f, indent=2)
+    return scale
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("out_dir")
+    ap.add_argument("--dataset-records", type=int, default=1000)
+    ap.add_argument("--users", type=int, default=100)
+    ap.add_argument("--results-per-user", type=int, default=20)
+    ap.add_argument("--heavy-user-results", type=int, default=1000)
+    ap.add_argument("--pdfs", type=int, default=26)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+    scale = generate(args.out_dir, args.dataset_records, args.users, args.results_per_user,
+                     args.heavy_user_results, args.pdfs, args.seed)
+    sizes = {name: os.path.getsize(os.path.join(args.out_dir, name)) for name in ("dataset.json", "users.json", "results.json")}
+    print(json.dumps({"scale": scale, "bytes": sizes}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
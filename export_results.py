@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+export_results.py
+
+Export saved results (results.json) as flat rows for offline analysis or audit,
+in CSV, JSON Lines or Parquet. Used by /api/admin/export and from the command line.
+
+Records are read with storage.iter_results and pass through a generator
+pipeline (filter -> flatten -> encode), so memory stays constant however many
+rows are exported: CSV/JSONL are produced in ~64 KB chunks, and Parquet is
+written one row group at a time with pyarrow (listed in requirements.txt).
+
+Filters: --since/--until (dates, inclusive, matched against the record
+timestamp), --disease and --risk (case-insensitive, comma-separated lists),
+--email.
+
+Usage:
+    python export_results.py --format csv --out results.csv
+    python export_results.py --format jsonl --since 2025-11-01 --risk high,moderate > high.jsonl
+    python export_results.py --format parquet --out results.parquet --disease typhoid
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from datetime import date
+
+from storage import iter_results, record_time
+
+FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+FIELDS = ("email", "patient_id", "timestamp", "recorded_at", "patient_name", "patient_age", "patient_gender",
+          "disease", "risk", "recommendations", "report_scores")
+CHUNK_BYTES = 64 * 1024
+PARQUET_ROW_GROUP = 50000
+
+
+class ExportError(ValueError):
+    """Raised for invalid export options or a format that cannot be produced here."""
+
+
+def _name_set(value):
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    return {v.strip().lower() for v in value if v and v.strip()} or None
+
+
+def _date(value, name):
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        raise ExportError(f"{name} must be a date (YYYY-MM-DD)")
+
+
+def make_filter(since=None, until=None, disease=None, risk=None, email=None):
+    """Predicate (email, record) -> bool for the given filters."""
+    since, until = _date(since, "since"), _date(until, "until")
+    diseases, risks = _name_set(disease), _name_set(risk)
+    email = (email or "").strip().lower() or None
+
+    def keep(owner, record):
+        if email and owner != email:
+            return False
+        if diseases and (record.get("disease") or "").strip().lower() not in diseases:
+            return False
+        if risks and (record.get("risk") or "").strip().lower() not in risks:
+            return False
+        if since or until:
+            when = record_time(record)
+            if when is None or (since and when.date() < since) or (until and when.date() > until):
+                return False
+        return True
+    return keep
+
+
+def iter_rows(keep=None, records=None):
+    """Flat export rows (dicts keyed by FIELDS) for every record passing `keep`."""
+    for owner, record in (iter_results() if records is None else records):
+        if keep is not None and not keep(owner, record):
+            continue
+        when = record_time(record)
+        yield {
+            "email": owner,
+            "patient_id": record.get("patient_id") or "",
+            "timestamp": record.get("timestamp") or "",
+            "recorded_at": when.isoformat() if when else "",
+            "patient_name": record.get("patient_name") or "",
+            "patient_age": "" if record.get("patient_age") in (None, "") else str(record.get("patient_age")),
+            "patient_gender": record.get("patient_gender") or "",
+            "disease": record.get("disease") or "",
+            "risk": record.get("risk") or "",
+            "recommendations": json.dumps(record.get("recommendations") or [], ensure_ascii=False),
+            "report_scores": json.dumps(record.get("report_scores") or {}, ensure_ascii=False),
+        }
+
+
+def csv_chunks(rows):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=FIELDS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buf.tell() >= CHUNK_BYTES:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def jsonl_chunks(rows):
+    parts, size = [], 0
+    for row in rows:
+        line = json.dumps(row, ensure_ascii=False) + "\n"
+        parts.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield "".join(parts)
+            parts, size = [], 0
+    if parts:
+        yield "".join(parts)
+
+
+def write_parquet(rows, path, row_group_size=PARQUET_ROW_GROUP):
+    """Write rows to a Parquet file one row group at a time. Returns the row count."""
+    try:
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("Parquet export needs pyarrow (pip install pyarrow); use csv or jsonl instead")
+    schema = pa.schema([(name, pa.string()) for name in FIELDS])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == row_group_size:
+                writer.write_table(pa.Table.from_pandas(pd.DataFrame(batch, columns=FIELDS), schema=schema, preserve_index=False))
+                count += len(batch)
+                batch = []
+        if batch or not count:
+            writer.write_table(pa.Table.from_pandas(pd.DataFrame(batch, columns=FIELDS), schema=schema, preserve_index=False))
+            count += len(batch)
+    return count
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export saved results as CSV, JSON Lines or Parquet.")
+    ap.add_argument("--format", choices=sorted(FORMATS), default="csv")
+    ap.add_argument("--out", help="output file (default: stdout; required for parquet)")
+    ap.add_argument("--since", help="first day to include (YYYY-MM-DD)")
+    ap.add_argument("--until", help="last day to include (YYYY-MM-DD)")
+    ap.add_argument("--disease", help="comma-separated disease names")
+    ap.add_argument("--risk", help="comma-separated risk levels")
+    ap.add_argument("--email", help="only this user's results")
+    args = ap.parse_args(argv)
+
+    try:
+        keep = make_filter(args.since, args.until, args.disease, args.risk, args.email)
+        started = time.perf_counter()
+        count = 0
+
+        def counted(rows):
+            nonlocal count
+            for row in rows:
+                count += 1
+                yield row
+
+        if args.format == "parquet":
+            if not args.out:
+                raise ExportError("--out is required for parquet")
+            write_parquet(counted(iter_rows(keep)), args.out)
+        else:
+            encode = csv_chunks if args.format == "csv" else jsonl_chunks
+            out = open(args.out, "w", encoding="utf-8", newline="") if args.out else sys.stdout
+            try:
+                for chunk in encode(counted(iter_rows(keep))):
+                    out.write(chunk)
+            finally:
+                if args.out:
+                    out.close()
+    except ExportError as e:
+        print(f"export failed: {e}", file=sys.stderr)
+        return 2
+    print(f"Exported {count} rows in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+# gunicorn.conf.py
+# Serving config for `gunicorn -c gunicorn.conf.py wsgi:app`. Every value can be
+# overridden from the environment (or on the gunicorn command line).
+#
+# Model: preloaded app + gthread workers. The app (ML model, dataset,
+# knowledge base, baby-thinking table) is imported and warmed once in the
+# master, then forked, so workers start instantly and share those pages
+# copy-on-write. Requests are mostly short CPU work under the GIL plus file
+# I/O, so a few processes per core with a handful of threads each; password
+# hashing and mail already run off the request threads.
+#
+# Graceful reload: `kill -HUP <master pid>` starts new workers and lets the
+# old ones finish in-flight requests (up to graceful_timeout). Because of
+# preload_app, code changes need a full restart (or USR2 + QUIT on the old
+# master); knowledge base updates do not (POST /api/admin/reload-kb).
+#
+# With more than one worker, OTP_BACKEND defaults to sqlite (OTP and rate-limit
+# state shared by every worker), and storage.lock flocks a lock file, so
+# workers serialise their JSON store writes. Set SESSION_SECRET so tokens
+# survive restarts.
+import multiprocessing
+import os
+
+_cpus = multiprocessing.cpu_count()
+
+bind = os.environ.get("BIND", f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+workers = int(os.environ.get("WEB_CONCURRENCY", str(min(2 * _cpus + 1, 9))))
+if workers > 1:
+    # read by otp_store and profiler when preload_app imports the app, after this file runs
+    os.environ.setdefault("WEB_CONCURRENCY", str(workers))
+    os.environ.setdefault("OTP_BACKEND", "sqlite")
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+preload_app = True
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))            # report parsing + PDF rendering
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))         # idle keep-alive seconds; behind a load balancer, set above its idle timeout
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "2000"))  # recycle workers to cap memory growth
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+accesslog = os.environ.get("GUNICORN_ACCESSLOG", "-")
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOGLEVEL", "info")
+
+
+def post_fork(server, worker):
+    from app import after_fork
+    after_fork()
+
+
+def when_ready(server):
+    server.log.info("MedPredict ready: %s workers x %s threads on %s", workers, threads, bind)
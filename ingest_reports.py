@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+ingest_reports.py
+
+Bulk back-fill of archived lab report PDFs into the results store.
+
+Walks a directory of PDFs, infers the test key of each report from its filename
+(e.g. sample_cbc_HIGH_RISK.pdf -> cbc) or, failing that, from its text, extracts
+the values with the same `parse_lab_text` used by /api/analyze-reports and
+appends one record per report to results.json in batches.
+
+Reports are attributed to a patient email either with --email, or by the first
+directory level below the archive root when it looks like an email address:
+
+    archive/
+        someone@example.com/sample_cbc_LOW_RISK.pdf
+        other@example.com/2024/kidney.pdf
+
+Progress is checkpointed after every batch, so an interrupted run can simply be
+started again with the same arguments; files already ingested are skipped.
+
+Usage:
+    python ingest_reports.py ARCHIVE_DIR [--email EMAIL] [--workers N]
+                             [--batch-size N] [--checkpoint FILE] [--dry-run]
+
+Stop the web server (or run against a copy of results.json) while ingesting:
+the server's lock only protects writes made from inside its own process.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from multiprocessing import Pool
+
+from report_parser import extract_and_classify, parse_lab_text, test_key_from_filename
+from storage import _read_json, _write_json, get_results_store, save_results_store, lock
+
+DEFAULT_CHECKPOINT = ".ingest_checkpoint.json"
+
+
+def find_pdfs(root):
+    """Yield paths (relative to root) of every PDF below root, in a stable order."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(".pdf"):
+                yield os.path.relpath(os.path.join(dirpath, name), root)
+
+
+def email_for(relpath, default_email):
+    """Owner of a report: --email if given, else the top-level folder name."""
+    if default_email:
+        return default_email
+    top = relpath.replace("\\", "/").split("/", 1)[0]
+    if "@" in top and top != relpath:
+        return top.strip().lower()
+    return ""
+
+
+def process_file(job):
+    """Worker: extract and parse one PDF. Runs in a pool process, so it only
+    returns plain data (never raises)."""
+    root, relpath = job
+    path = os.path.join(root, relpath)
+    out = {"file": relpath, "test_key": None, "data": {}, "error": None, "mtime": None}
+    try:
+        out["mtime"] = os.path.getmtime(path)
+        text, detected, _confidence, _scores = extract_and_classify(path)
+        key = test_key_from_filename(relpath) or detected
+        if not key:
+            out["error"] = "unknown_test_type"
+            return out
+        out["test_key"] = key
+        parsed = parse_lab_text(key, text)
+        if parsed and all(v == "" for v in parsed.values()):
+            out["error"] = "no_fields_extracted"
+        out["data"] = parsed
+    except Exception as e:
+        out["error"] = f"Failed to read PDF: {type(e).__name__}: {e}"
+    return out
+
+
+def _next_patient_numbers(store):
+    """email -> highest numeric patient ID already used (same rule as the app)."""
+    numbers = {}
+    for email, rows in store.items():
+        if not isinstance(rows, list):
+            continue  # skip _patient_id_counter_* entries
+        max_id_num = 100
+        for rec in rows:
+            num_str = ''.join(filter(str.isdigit, rec.get("patient_id", "") or ""))
+            if num_str:
+                max_id_num = max(max_id_num, int(num_str))
+        numbers[email] = max_id_num
+    return numbers
+
+
+def build_record(result, email, next_num):
+    """Results-store record for one parsed report (same shape as /api/save-result)."""
+    stamp = datetime.fromtimestamp(result["mtime"]).strftime("%d/%m/%Y, %H:%M:%S")
+    return {
+        "email": email,
+        "timestamp": stamp,
+        "client_key": f"{stamp}|Lab Report|{result['file']}",
+        "patient_name": "",
+        "patient_age": "",
+        "patient_gender": "",
+        "disease": "",
+        "risk": "",
+        "recommendations": [],
+        "report_scores": {},
+        "lab_reports": {result["test_key"]: result["data"]},
+        "source_file": result["file"],
+        "patient_id": f"{email[0].lower()}{next_num}",
+    }
+
+
+def flush(batch, checkpoint, checkpoint_path, dry_run):
+    """Append a batch of records to the results store in a single write,
+    then record the batch's files in the checkpoint."""
+    written = 0
+    if dry_run:
+        return written
+    if batch:
+        with lock:   # also excludes a running server's writes (flock)
+            store = get_results_store()
+            numbers = _next_patient_numbers(store)
+            already = {rec.get("source_file") for rows in store.values() if isinstance(rows, list)
+                       for rec in rows if rec.get("source_file")}
+            for result, email in batch:
+                if result["file"] in already:
+                    continue  # ingested before the last checkpoint was saved
+                num = numbers.get(email, 100) + 1
+                numbers[email] = num
+                store.setdefault(email, []).append(build_record(result, email, num))
+                store[f"_patient_id_counter_{email}"] = num + 1
+                written += 1
+            save_results_store(store)
+    checkpoint["done"].extend(result["file"] for result, _ in batch)
+    _write_json(checkpoint_path, checkpoint)
+    return written
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Bulk-ingest archived lab report PDFs into results.json")
+    ap.add_argument("root", help="directory to scan for PDFs")
+    ap.add_argument("--email", default="", help="attribute every report to this patient email")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="extraction processes")
+    ap.add_argument("--batch-size", type=int, default=200, help="records per results-store write")
+    ap.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="progress file used to resume")
+    ap.add_argument("--dry-run", action="store_true", help="parse and report, but do not write results")
+    args = ap.parse_args(argv)
+
+    root = os.path.abspath(args.root)
+    default_email = args.email.strip().lower()
+    checkpoint = _read_json(args.checkpoint, {})
+    if checkpoint.get("root") != root:
+        checkpoint = {"root": root, "done": []}
+    done = set(checkpoint["done"])
+
+    jobs, skipped_owner = [], 0
+    for rel in find_pdfs(root):
+        if rel in done:
+            continue
+        if not email_for(rel, default_email):
+            skipped_owner += 1
+            continue
+        jobs.append((root, rel))
+
+    print(f"{len(jobs)} PDFs to ingest ({len(done)} already done, {skipped_owner} without owner email)")
+    if not jobs:
+        return 0
+
+    started = time.perf_counter()
+    processed = ingested = failed = 0
+    batch = []
+    with Pool(processes=max(1, args.workers)) as pool:
+        for result in pool.imap_unordered(process_file, jobs, chunksize=4):
+            processed += 1
+            if result["error"] and not result["test_key"]:
+                failed += 1
+                print(f"  ✗ {result['file']}: {result['error']}")
+                checkpoint["done"].append(result["file"])
+            else:
+                if result["error"]:
+                    print(f"  ! {result['file']}: {result['error']}")
+                batch.append((result, email_for(result["file"], default_email)))
+            if len(batch) >= args.batch_size:
+                ingested += flush(batch, checkpoint, args.checkpoint, args.dry_run)
+                batch = []
+                rate = processed / (time.perf_counter() - started)
+                print(f"  {processed}/{len(jobs)} files, {rate:.1f} files/sec")
+        ingested += flush(batch, checkpoint, args.checkpoint, args.dry_run)
+
+    elapsed = time.perf_counter() - started
+    rate = processed / elapsed if elapsed else 0.0
+    print(f"Processed {processed} files in {elapsed:.1f}s ({rate:.1f} files/sec): "
+          f"{ingested} records written, {failed} unreadable")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
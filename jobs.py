@@ -0,0 +1,87 @@
+# jobs.py
+# Background jobs for slow admin operations (e.g. deleting a user with a long
+# history), with status polling by job id.
+#
+# A job runs on a thread of the worker that submitted it, but its status lives
+# in a SQLite file (JOB_DB_FILE, by default the OTP store's file), so a status
+# poll answered by any other gunicorn/uvicorn worker sees it too.
+import json, os, sqlite3, threading, traceback, uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from otp_store import OTP_DB_FILE
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "1"))
+JOB_STATUS_HISTORY = 1000   # finished jobs kept for status() lookups
+JOB_DB_FILE = os.environ.get("JOB_DB_FILE", OTP_DB_FILE)
+
+_FIELDS = ("id", "kind", "state", "created_at", "finished_at", "result", "error")
+
+
+class JobRunner:
+    def __init__(self, workers=JOB_WORKERS, path=JOB_DB_FILE):
+        self.workers = max(1, workers)
+        self.path = path
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="job")
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, kind TEXT NOT NULL, state TEXT NOT NULL,"
+                " created_at TEXT NOT NULL, finished_at TEXT, result TEXT, error TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs(created_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def submit(self, kind, fn, *args):
+        """Run fn(*args) in the background and return the job id. The job's
+        result (fn's return value, JSON-serializable) is reported by status()
+        once it is done."""
+        job_id = uuid.uuid4().hex
+        conn = self._conn()
+        conn.execute("INSERT INTO jobs (id, kind, state, created_at) VALUES (?, ?, 'queued', ?)",
+                     (job_id, kind, datetime.utcnow().isoformat()))
+        conn.execute("DELETE FROM jobs WHERE id IN (SELECT id FROM jobs ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                     (JOB_STATUS_HISTORY,))
+        self._pool.submit(self._run, job_id, fn, args)
+        return job_id
+
+    def status(self, job_id):
+        row = self._conn().execute(f"SELECT {', '.join(_FIELDS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(_FIELDS, row))
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+    def after_fork(self):
+        """Threads and SQLite connections do not survive fork(): start afresh."""
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="job")
+        self._local = threading.local()
+
+    def _update(self, job_id, **fields):
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        self._conn().execute(f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?",
+                             (*fields.values(), job_id))
+
+    def _run(self, job_id, fn, args):
+        self._update(job_id, state="running")
+        try:
+            result = fn(*args)
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job_id, state="failed", error=f"{type(e).__name__}: {e}",
+                         finished_at=datetime.utcnow().isoformat())
+        else:
+            self._update(job_id, state="done", result=result, finished_at=datetime.utcnow().isoformat())
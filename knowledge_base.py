@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+knowledge_base.py
+
+Versioned recommendation knowledge base (symptom protocols by age category and
+infant month range), loaded from knowledge_base/recommendations.json instead of
+being hard-coded, so guidance can be updated without a code deploy.
+
+The JSON source is validated against a small schema and compiled to a marshal
+snapshot (recommendations.kb, next to the source) that later starts load
+directly; the snapshot is rebuilt whenever the source content changes.
+
+The active knowledge base is one immutable KnowledgeBase object. `reload()`
+builds a new one and swaps the module reference in a single assignment, so a
+request always sees either the old or the new version, never a mix. With
+KB_RELOAD_SECONDS > 0 the source file is re-checked at most that often.
+
+Usage:
+    python knowledge_base.py validate [PATH]   # check a source file
+    python knowledge_base.py compile           # (re)build the snapshot
+"""
+import hashlib
+import json
+import marshal
+import os
+import sys
+import threading
+import time
+from types import MappingProxyType
+
+KB_DIR = os.environ.get("KB_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_base"))
+KB_SOURCE = os.path.join(KB_DIR, "recommendations.json")
+KB_SNAPSHOT = os.path.join(KB_DIR, "recommendations.kb")
+KB_RELOAD_SECONDS = float(os.environ.get("KB_RELOAD_SECONDS", "0"))  # 0 = only on explicit reload()
+
+SNAPSHOT_FORMAT = 1
+
+AGE_CATEGORIES = ("infant", "child", "teen", "adult", "elderly")
+MONTH_RANGES = ("0-2", "3-5", "6-8", "9-12")
+PROTOCOL_LIST_FIELDS = ("medicines", "diet", "drinks", "lifestyle")
+PROTOCOL_TEXT_FIELDS = ("medicine_timing", "advice")
+
+
+class KnowledgeBaseError(ValueError):
+    """Raised when a knowledge base source fails validation or cannot be loaded."""
+
+
+def _freeze(obj):
+    """Recursively convert dicts to read-only mappings and lists to tuples."""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+
+def thaw(obj):
+    """Inverse of _freeze: plain dicts and lists (e.g. for JSON responses)."""
+    if isinstance(obj, MappingProxyType):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, tuple):
+        return [thaw(v) for v in obj]
+    return obj
+
+
+# ---------------- Schema ----------------
+def _check_protocol(where, protocol, extra_text=()):
+    if not isinstance(protocol, dict):
+        raise KnowledgeBaseError(f"{where}: expected an object")
+    for field in PROTOCOL_LIST_FIELDS:
+        value = protocol.get(field)
+        if not isinstance(value, list) or not all(isinstance(v, str) and v for v in value):
+            raise KnowledgeBaseError(f"{where}.{field}: expected a list of non-empty strings")
+    for field in PROTOCOL_TEXT_FIELDS + tuple(extra_text):
+        if not isinstance(protocol.get(field), str) or not protocol[field]:
+            raise KnowledgeBaseError(f"{where}.{field}: expected a non-empty string")
+    unknown = set(protocol) - set(PROTOCOL_LIST_FIELDS) - set(PROTOCOL_TEXT_FIELDS) - set(extra_text)
+    if unknown:
+        raise KnowledgeBaseError(f"{where}: unknown fields {sorted(unknown)}")
+
+
+def validate(data):
+    """Validate a parsed knowledge base source. Raises KnowledgeBaseError."""
+    if not isinstance(data, dict):
+        raise KnowledgeBaseError("knowledge base must be a JSON object")
+    if not isinstance(data.get("version"), str) or not data["version"].strip():
+        raise KnowledgeBaseError("version: expected a non-empty string")
+    for section, keys, extra in (("age_specific_symptoms", AGE_CATEGORIES, ()),
+                                 ("month_specific", MONTH_RANGES, ("age_stage",))):
+        symptoms = data.get(section)
+        if not isinstance(symptoms, dict):
+            raise KnowledgeBaseError(f"{section}: expected an object of symptoms")
+        for symptom, by_age in symptoms.items():
+            if not isinstance(by_age, dict) or not by_age:
+                raise KnowledgeBaseError(f"{section}.{symptom}: expected an object of age groups")
+            unknown = set(by_age) - set(keys)
+            if unknown:
+                raise KnowledgeBaseError(f"{section}.{symptom}: unknown age groups {sorted(unknown)}")
+            for age_key, protocol in by_age.items():
+                _check_protocol(f"{section}.{symptom}.{age_key}", protocol, extra)
+    return data
+
+
+# ---------------- Loading ----------------
+class KnowledgeBase:
+    """One immutable, validated version of the knowledge base."""
+    __slots__ = ("version", "age_specific", "month_specific", "source_sha256", "loaded_at")
+
+    def __init__(self, data, source_sha256):
+        self.version = data["version"]
+        self.age_specific = _freeze(data["age_specific_symptoms"])
+        self.month_specific = _freeze(data["month_specific"])
+        self.source_sha256 = source_sha256
+        self.loaded_at = time.time()
+
+
+def _read_snapshot(path, source_sha256):
+    """Return the snapshot's data if it was compiled from this exact source."""
+    try:
+        with open(path, "rb") as f:
+            snap = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(snap, dict) or snap.get("format") != SNAPSHOT_FORMAT \
+            or snap.get("source_sha256") != source_sha256:
+        return None
+    return snap.get("data")
+
+
+def _write_snapshot(path, data, source_sha256):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        marshal.dump({"format": SNAPSHOT_FORMAT, "source_sha256": source_sha256, "data": data}, f)
+    os.replace(tmp, path)
+
+
+def load(source=KB_SOURCE, snapshot=KB_SNAPSHOT):
+    """Load a KnowledgeBase, preferring an up-to-date compiled snapshot.
+    Compiles the snapshot when it is missing or stale (best effort)."""
+    try:
+        with open(source, "rb") as f:
+            raw = f.read()
+    except OSError as e:
+        raise KnowledgeBaseError(f"cannot read {source}: {e}") from e
+    sha = hashlib.sha256(raw).hexdigest()
+
+    data = _read_snapshot(snapshot, sha) if snapshot else None
+    if data is None:
+        try:
+            data = json.loads(raw.decode("utf-8"))
+        except ValueError as e:
+            raise KnowledgeBaseError(f"{source}: invalid JSON: {e}") from e
+        validate(data)
+        if snapshot:
+            try:
+                _write_snapshot(snapshot, data, sha)
+            except OSError as e:
+                print(f"Could not write knowledge base snapshot {snapshot}: {e}")
+    return KnowledgeBase(data, sha)
+
+
+_active = None
+_reload_lock = threading.Lock()
+_last_check = 0.0
+_source_mtime = None
+
+
+def reload(force=False):
+    """Load the source again and atomically swap it in if it changed.
+    Keeps the current version (and raises KnowledgeBaseError) if the new one is invalid."""
+    global _active, _last_check, _source_mtime
+    with _reload_lock:
+        _last_check = time.monotonic()
+        try:
+            mtime = os.path.getmtime(KB_SOURCE)
+        except OSError:
+            mtime = None
+        if _active is not None and not force and mtime == _source_mtime:
+            return _active
+        kb = load()
+        _source_mtime = mtime
+        if _active is None or kb.source_sha256 != _active.source_sha256:
+            _active = kb  # single reference assignment: readers see old or new, never a mix
+            print(f"Loaded recommendation knowledge base version {kb.version}")
+        return _active
+
+
+def active():
+    """The knowledge base currently in use (loaded on first call)."""
+    kb = _active
+    if kb is None:
+        return reload()
+    if KB_RELOAD_SECONDS > 0 and time.monotonic() - _last_check >= KB_RELOAD_SECONDS:
+        try:
+            return reload()
+        except KnowledgeBaseError as e:
+            print(f"Knowledge base reload failed, keeping version {kb.version}: {e}")
+    return _active
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    cmd = argv[0] if argv else "compile"
+    if cmd == "validate":
+        path = argv[1] if len(argv) > 1 else KB_SOURCE
+        kb = load(path, snapshot=None)
+        print(f"{path}: OK (version {kb.version}, {len(kb.age_specific)} symptoms, "
+              f"{len(kb.month_specific)} infant protocols)")
+    elif cmd == "compile":
+        if os.path.exists(KB_SNAPSHOT):
+            os.remove(KB_SNAPSHOT)
+        kb = load()
+        print(f"Compiled {KB_SOURCE} (version {kb.version}) -> {KB_SNAPSHOT}")
+    else:
+        print(__doc__)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KnowledgeBaseError as e:
+        print(f"Invalid knowledge base: {e}")
+        sys.exit(1)
@@ -0,0 +1,177 @@
+# mail_queue.py
+# Background delivery queue for OTP and notification emails.
+#
+# Request handlers call `enqueue()` and return immediately; worker threads
+# deliver through the given send function (app.send_mail), retrying transient
+# failures with exponential backoff. Messages that still fail after
+# MAIL_MAX_ATTEMPTS, or fail permanently (bad credentials, refused recipient),
+# are appended to a JSON-lines dead-letter log.
+#
+# To try it against a local stand-in SMTP server instead of a real provider:
+#     pip install aiosmtpd && python -m aiosmtpd -n -l localhost:1025
+#     SMTP_HOST=localhost SMTP_PORT=1025 SMTP_SECURITY=none python app.py
+import heapq, itertools, json, os, smtplib, threading, time, uuid
+from collections import OrderedDict
+from datetime import datetime
+
+MAIL_WORKERS = int(os.environ.get("MAIL_WORKERS", "2"))   # delivery threads (match SMTP_POOL_SIZE)
+MAIL_MAX_ATTEMPTS = int(os.environ.get("MAIL_MAX_ATTEMPTS", "5"))
+MAIL_BACKOFF_SECONDS = float(os.environ.get("MAIL_BACKOFF_SECONDS", "2"))      # first retry delay
+MAIL_BACKOFF_MAX_SECONDS = float(os.environ.get("MAIL_BACKOFF_MAX_SECONDS", "120"))
+MAIL_DEAD_LETTER_FILE = os.environ.get("MAIL_DEAD_LETTER_FILE", "mail_dead_letter.jsonl")
+MAIL_STATUS_HISTORY = 10000   # job statuses kept for status() lookups
+
+# Failures that retrying cannot fix
+PERMANENT_ERRORS = (smtplib.SMTPAuthenticationError, smtplib.SMTPRecipientsRefused)
+
+
+class MailJob:
+    __slots__ = ("id", "to_email", "subject", "body", "attempts", "created", "last_error")
+
+    def __init__(self, to_email, subject, body):
+        self.id = uuid.uuid4().hex
+        self.to_email = to_email
+        self.subject = subject
+        self.body = body
+        self.attempts = 0
+        self.created = datetime.utcnow()
+        self.last_error = None
+
+
+class MailQueue:
+    """Retrying background mail sender. `send_fn(to_email, subject, body)` does
+    the actual delivery and raises on failure."""
+
+    def __init__(self, send_fn, workers=MAIL_WORKERS, max_attempts=MAIL_MAX_ATTEMPTS, backoff=MAIL_BACKOFF_SECONDS,
+                 backoff_max=MAIL_BACKOFF_MAX_SECONDS, dead_letter_file=MAIL_DEAD_LETTER_FILE):
+        self.send_fn = send_fn
+        self.workers = max(1, workers)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.dead_letter_file = dead_letter_file
+        self._heap = []                 # (due monotonic time, seq, job)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._status = OrderedDict()    # job id -> "queued" | "retrying" | "sent" | "failed"
+        self._stats = {"enqueued": 0, "sent": 0, "retried": 0, "dead_lettered": 0}
+        self._stopping = False
+        self._busy = 0                  # jobs being delivered right now
+        self._threads = []
+
+    # ---------------- producer side ----------------
+    def start(self):
+        with self._cond:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            self._stopping = False
+            while len(self._threads) < self.workers:
+                t = threading.Thread(target=self._run, name=f"mail-queue-{len(self._threads)}", daemon=True)
+                t.start()
+                self._threads.append(t)
+        return self
+
+    def enqueue(self, to_email, subject, body):
+        """Queue a message for delivery and return its job id."""
+        job = MailJob(to_email, subject, body)
+        with self._cond:
+            self._push(job, time.monotonic())
+            self._set_status(job, "queued")
+            self._stats["enqueued"] += 1
+        self.start()
+        return job.id
+
+    def status(self, job_id):
+        with self._cond:
+            return self._status.get(job_id)
+
+    def stats(self):
+        with self._cond:
+            return dict(self._stats, pending=len(self._heap))
+
+    def stop(self, timeout=5.0):
+        """Deliver what is due within `timeout` seconds, then stop the workers."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while (self._heap or self._busy) and time.monotonic() < deadline:
+                self._cond.wait(0.05)
+            self._stopping = True
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+
+    # ---------------- worker side ----------------
+    def _push(self, job, due):
+        heapq.heappush(self._heap, (due, next(self._seq), job))
+        self._cond.notify()
+
+    def _set_status(self, job, status):
+        self._status[job.id] = status
+        self._status.move_to_end(job.id)
+        while len(self._status) > MAIL_STATUS_HISTORY:
+            self._status.popitem(last=False)
+
+    def _next_job(self):
+        with self._cond:
+            while not self._stopping:
+                if self._heap:
+                    wait = self._heap[0][0] - time.monotonic()
+                    if wait <= 0:
+                        self._busy += 1
+                        return heapq.heappop(self._heap)[2]
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+            return None
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                self._deliver(job)
+            finally:
+                with self._cond:
+                    self._busy -= 1
+                    self._cond.notify_all()
+
+    def _deliver(self, job):
+        job.attempts += 1
+        try:
+            self.send_fn(job.to_email, job.subject, job.body)
+        except Exception as e:
+            job.last_error = f"{type(e).__name__}: {e}"
+            if isinstance(e, PERMANENT_ERRORS) or job.attempts >= self.max_attempts:
+                self._dead_letter(job)
+                return
+            delay = min(self.backoff * (2 ** (job.attempts - 1)), self.backoff_max)
+            print(f"mail {job.id} to {job.to_email} failed (attempt {job.attempts}), retrying in {delay:g}s: {job.last_error}")
+            with self._cond:
+                self._set_status(job, "retrying")
+                self._stats["retried"] += 1
+                self._push(job, time.monotonic() + delay)
+            return
+        with self._cond:
+            self._set_status(job, "sent")
+            self._stats["sent"] += 1
+
+    def _dead_letter(self, job):
+        # The body is left out on purpose: OTP mails carry the code in it.
+        entry = {
+            "id": job.id,
+            "to": job.to_email,
+            "subject": job.subject,
+            "attempts": job.attempts,
+            "error": job.last_error,
+            "created_at": job.created.isoformat(),
+            "failed_at": datetime.utcnow().isoformat(),
+        }
+        print(f"mail {job.id} to {job.to_email} dead-lettered after {job.attempts} attempt(s): {job.last_error}")
+        try:
+            with open(self.dead_letter_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"could not write dead-letter log {self.dead_letter_file}: {e}")
+        with self._cond:
+            self._set_status(job, "failed")
+            self._stats["dead_lettered"] += 1
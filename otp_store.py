@@ -0,0 +1,251 @@
+# otp_store.py
+# Expiring OTP store with pluggable backends (OTP_BACKEND):
+#   memory  - per-process dict + expiry heap (default with one worker)
+#   sqlite  - one SQLite file shared by every worker process (OTP_DB_FILE), so
+#             an OTP issued by one gunicorn worker verifies on another and the
+#             send rate limit is global rather than per worker (default when
+#             WEB_CONCURRENCY > 1, and with gunicorn.conf.py's multi-worker setup)
+# Both expose issue / get / mark_verified / discard / sweep.
+#
+# The memory backend keeps entries in a dict for O(1) lookup plus a min-heap
+# ordered by removal time; the sqlite backend keys a WITHOUT ROWID table on the
+# email and indexes the removal time. In both, a background sweeper removes
+# expired entries, so emails that never finish the reset flow do not
+# accumulate; when the store is full the entry closest to removal is evicted. Entries are kept OTP_RETAIN_SECONDS past
+# their expiry so /api/verify-otp can still answer "expired" rather than
+# "no OTP issued".
+import heapq, itertools, os, sqlite3, threading, time
+from datetime import datetime, timedelta
+
+OTP_MAX_ENTRIES = int(os.environ.get("OTP_MAX_ENTRIES", "100000"))
+OTP_RETAIN_SECONDS = int(os.environ.get("OTP_RETAIN_SECONDS", "600"))    # kept after expiry
+OTP_SWEEP_SECONDS = float(os.environ.get("OTP_SWEEP_SECONDS", "30"))     # sweeper interval
+# gunicorn and uvicorn both take their worker count from WEB_CONCURRENCY
+OTP_BACKEND = (os.environ.get("OTP_BACKEND")
+               or ("sqlite" if int(os.environ.get("WEB_CONCURRENCY") or 1) > 1 else "memory")).lower()
+OTP_DB_FILE = os.environ.get("OTP_DB_FILE", "otp_store.sqlite3")
+
+
+class OTPEntry:
+    __slots__ = ("otp", "expires", "last_sent", "verified", "remove_at")
+
+    def __init__(self, otp, expires, last_sent, verified=False, remove_at=None):
+        self.otp = otp
+        self.expires = expires
+        self.last_sent = last_sent
+        self.verified = verified
+        self.remove_at = remove_at or expires + timedelta(seconds=OTP_RETAIN_SECONDS)
+
+
+class ExpiringOTPStore:
+    """email -> OTPEntry with heap-based expiry and a size cap."""
+
+    def __init__(self, max_entries=OTP_MAX_ENTRIES, sweep_seconds=OTP_SWEEP_SECONDS):
+        self.max_entries = max_entries
+        self.sweep_seconds = sweep_seconds
+        self._entries = {}
+        self._heap = []                 # (remove_at, seq, email, entry)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._sweeper = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    # ---------------- public API ----------------
+    def issue(self, email, otp, now, ttl_seconds, rate_limit_seconds):
+        """Store a new unverified OTP for email unless one was sent less than
+        rate_limit_seconds ago. Returns True if issued, False if rate-limited."""
+        with self._lock:
+            current = self._live(email, now)
+            if current and (now - current.last_sent).total_seconds() < rate_limit_seconds:
+                return False
+            entry = OTPEntry(otp, now + timedelta(seconds=ttl_seconds), now)
+            self._entries[email] = entry
+            heapq.heappush(self._heap, (entry.remove_at, next(self._seq), email, entry))
+            while len(self._entries) > self.max_entries:
+                self._evict_one()
+        self._ensure_sweeper()
+        return True
+
+    def get(self, email, now=None):
+        """The entry for email, or None if there is none (or it was due for removal)."""
+        with self._lock:
+            return self._live(email, now or datetime.utcnow())
+
+    def mark_verified(self, email):
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None:
+                return False
+            entry.verified = True
+            return True
+
+    def discard(self, email):
+        with self._lock:
+            self._entries.pop(email, None)  # its heap item goes stale and is skipped
+
+    def sweep(self, now=None):
+        """Remove every entry whose removal time has passed. Returns the count."""
+        now = now or datetime.utcnow()
+        removed = 0
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, _, email, entry = heapq.heappop(self._heap)
+                if self._entries.get(email) is entry:
+                    del self._entries[email]
+                    removed += 1
+            # drop stale heap items once they outnumber live entries
+            if len(self._heap) > 2 * len(self._entries) + 64:
+                self._heap = [item for item in self._heap if self._entries.get(item[2]) is item[3]]
+                heapq.heapify(self._heap)
+        return removed
+
+    # ---------------- internals (call with _lock held) ----------------
+    def _live(self, email, now):
+        entry = self._entries.get(email)
+        if entry is not None and entry.remove_at <= now:
+            del self._entries[email]
+            return None
+        return entry
+
+    def _evict_one(self):
+        while self._heap:
+            _, _, email, entry = heapq.heappop(self._heap)
+            if self._entries.get(email) is entry:
+                del self._entries[email]
+                return
+
+    def _ensure_sweeper(self):
+        if self._sweeper is None:
+            with self._lock:
+                if self._sweeper is None:
+                    self._sweeper = _start_sweeper(self)
+
+    def after_fork(self):
+        """Threads do not survive fork(): let the child start its own sweeper."""
+        self._lock = threading.Lock()
+        self._sweeper = None
+
+
+def _start_sweeper(store):
+    """Run store.sweep() every store.sweep_seconds on a daemon thread."""
+    if store.sweep_seconds <= 0:
+        return False
+    def loop():
+        while True:
+            time.sleep(store.sweep_seconds)
+            try:
+                store.sweep()
+            except Exception as e:
+                print(f"otp sweep error: {e}")
+    thread = threading.Thread(target=loop, name="otp-sweeper", daemon=True)
+    thread.start()
+    return thread
+
+
+def _ts(dt):
+    return dt.timestamp() if dt.tzinfo else (dt - datetime(1970, 1, 1)).total_seconds()
+
+
+def _dt(ts):
+    return datetime(1970, 1, 1) + timedelta(seconds=ts)
+
+
+class SQLiteOTPStore:
+    """OTP store in a SQLite file shared by all worker processes. Lookups go
+    through the email primary key; issue() runs under BEGIN IMMEDIATE so the
+    rate-limit check and the write are atomic across processes."""
+
+    def __init__(self, path=OTP_DB_FILE, max_entries=OTP_MAX_ENTRIES, sweep_seconds=OTP_SWEEP_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.sweep_seconds = sweep_seconds
+        self._local = threading.local()
+        self._sweeper = None
+        self._sweeper_lock = threading.Lock()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS otp ("
+                " email TEXT PRIMARY KEY, otp TEXT NOT NULL, expires REAL NOT NULL,"
+                " last_sent REAL NOT NULL, verified INTEGER NOT NULL DEFAULT 0,"
+                " remove_at REAL NOT NULL) WITHOUT ROWID")
+            conn.execute("CREATE INDEX IF NOT EXISTS otp_remove_at ON otp(remove_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM otp").fetchone()[0]
+
+    def issue(self, email, otp, now, ttl_seconds, rate_limit_seconds):
+        entry = OTPEntry(otp, now + timedelta(seconds=ttl_seconds), now)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT last_sent, remove_at FROM otp WHERE email = ?", (email,)).fetchone()
+            if row and row[1] > _ts(now) and _ts(now) - row[0] < rate_limit_seconds:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO otp (email, otp, expires, last_sent, verified, remove_at) VALUES (?, ?, ?, ?, 0, ?)",
+                (email, otp, _ts(entry.expires), _ts(now), _ts(entry.remove_at)))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._ensure_sweeper()
+        return True
+
+    def get(self, email, now=None):
+        row = self._conn().execute(
+            "SELECT otp, expires, last_sent, verified, remove_at FROM otp WHERE email = ? AND remove_at > ?",
+            (email, _ts(now or datetime.utcnow()))).fetchone()
+        if row is None:
+            return None
+        return OTPEntry(row[0], _dt(row[1]), _dt(row[2]), bool(row[3]), _dt(row[4]))
+
+    def mark_verified(self, email):
+        cur = self._conn().execute("UPDATE otp SET verified = 1 WHERE email = ?", (email,))
+        return cur.rowcount > 0
+
+    def discard(self, email):
+        self._conn().execute("DELETE FROM otp WHERE email = ?", (email,))
+
+    def sweep(self, now=None):
+        """Delete entries past their removal time, then trim to max_entries."""
+        conn = self._conn()
+        removed = conn.execute("DELETE FROM otp WHERE remove_at <= ?", (_ts(now or datetime.utcnow()),)).rowcount
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            removed += conn.execute(
+                "DELETE FROM otp WHERE email IN (SELECT email FROM otp ORDER BY remove_at LIMIT ?)", (excess,)).rowcount
+        return removed
+
+    def _ensure_sweeper(self):
+        if self._sweeper is None:
+            with self._sweeper_lock:
+                if self._sweeper is None:
+                    self._sweeper = _start_sweeper(self)
+
+    def after_fork(self):
+        """SQLite connections must not be shared with the parent: open new ones."""
+        self._local = threading.local()
+        self._sweeper_lock = threading.Lock()
+        self._sweeper = None
+
+
+def create_otp_store(backend=OTP_BACKEND):
+    """OTP store for the configured backend ("memory" or "sqlite")."""
+    if backend == "sqlite":
+        return SQLiteOTPStore()
+    if backend != "memory":
+        raise ValueError(f"Unknown OTP_BACKEND {backend!r} (expected 'memory' or 'sqlite')")
+    return ExpiringOTPStore()
@@ -0,0 +1,107 @@
+# password_hasher.py
+# Password hashing and verification on a bounded process pool.
+#
+# Werkzeug's default scrypt (scrypt:32768:8:1) costs tens of milliseconds of CPU
+# and ~32 MB per call. Run inline it blocks the request thread and, through the
+# GIL, every other request in the worker. Hashes run in PASSWORD_HASH_WORKERS
+# child processes instead; at most PASSWORD_HASH_MAX_PENDING calls may be
+# running or queued at once, and callers that cannot get a slot within
+# PASSWORD_HASH_WAIT_SECONDS get HasherBusy (the endpoints answer 503).
+#
+# PASSWORD_HASH_WORKERS=0 hashes inline in the calling thread (same limits).
+import atexit, multiprocessing, os, threading, time
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", str(min(2, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", "16"))     # running + queued
+PASSWORD_HASH_WAIT_SECONDS = float(os.environ.get("PASSWORD_HASH_WAIT_SECONDS", "5"))  # wait for a slot
+PASSWORD_HASH_START_METHOD = os.environ.get("PASSWORD_HASH_START_METHOD") or None      # fork/spawn/forkserver
+
+
+class HasherBusy(RuntimeError):
+    """Raised when every hashing slot stays taken for PASSWORD_HASH_WAIT_SECONDS."""
+
+
+def _timed(fn, *args):
+    # Runs in the child: report when work actually started so the parent can
+    # tell queue wait from hashing time.
+    started = time.time()
+    return fn(*args), started, time.time()
+
+
+class PasswordHasher:
+    def __init__(self, workers=PASSWORD_HASH_WORKERS, max_pending=PASSWORD_HASH_MAX_PENDING,
+                 wait_seconds=PASSWORD_HASH_WAIT_SECONDS, start_method=PASSWORD_HASH_START_METHOD):
+        self.workers = workers
+        self.wait_seconds = wait_seconds
+        self.start_method = start_method
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._pool = None
+        self._lock = threading.Lock()
+        self._stats = {"completed": 0, "rejected": 0, "failed": 0, "in_flight": 0, "max_in_flight": 0,
+                       "wait_seconds_total": 0.0, "wait_seconds_max": 0.0, "hash_seconds_total": 0.0}
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats, workers=self.workers)
+        done = s["completed"] or 1
+        s["queued"] = max(0, s["in_flight"] - max(1, self.workers))
+        s["wait_ms_avg"] = round(s.pop("wait_seconds_total") / done * 1000, 2)
+        s["wait_ms_max"] = round(s.pop("wait_seconds_max") * 1000, 2)
+        s["hash_ms_avg"] = round(s.pop("hash_seconds_total") / done * 1000, 2)
+        return s
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    # ---------------- internals ----------------
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                ctx = multiprocessing.get_context(self.start_method)
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=ctx)
+            return self._pool
+
+    def _run(self, fn, *args):
+        submitted = time.time()
+        if not self._slots.acquire(timeout=self.wait_seconds):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise HasherBusy("Password hashing is at capacity")
+        with self._lock:
+            self._stats["in_flight"] += 1
+            self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._stats["in_flight"])
+        try:
+            if self.workers > 0:
+                result, started, finished = self._executor().submit(_timed, fn, *args).result()
+            else:
+                result, started, finished = _timed(fn, *args)
+        except Exception:
+            with self._lock:
+                self._stats["failed"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._stats["in_flight"] -= 1
+            self._slots.release()
+        waited = max(0.0, started - submitted)
+        with self._lock:
+            self._stats["completed"] += 1
+            self._stats["wait_seconds_total"] += waited
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+            self._stats["hash_seconds_total"] += finished - started
+        return result
+
+
+hasher = PasswordHasher()
+atexit.register(hasher.shutdown)
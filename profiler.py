@@ -0,0 +1,201 @@
+# profiler.py
+# Opt-in sampling profiler for production hot-path diagnosis.
+#
+# Nothing runs until an admin starts a session (/api/admin/profile/start). While
+# a session is active, a `sample_rate` fraction of requests to the chosen
+# endpoints (default /api/predict and /api/analyze-reports) is tracked, and a
+# sampler thread records the Python stack of every tracked request's thread
+# every `interval` seconds (sys._current_frames; the request threads themselves
+# are never interrupted or traced). Stacks are aggregated as counts and
+# downloaded in the collapsed ("folded") format read by flamegraph.pl,
+# speedscope and inferno:
+#
+#     /api/predict;app.api_predict;app.predict;app.predict.<locals>.jaccard 42
+#
+# Overhead: none when no session is active (one attribute check per request);
+# during a session, one random() per request, the sampler's stack walks and a
+# shorter GIL switch interval (see PROFILE_SWITCH_INTERVAL), together roughly
+# 10-20% on CPU-bound requests.
+# Sessions end after `duration` seconds or on /api/admin/profile/stop. Samples
+# are per process, so with several workers (WEB_CONCURRENCY > 1) a session would
+# only see the requests of whichever worker took the start call: starting one
+# is refused there (409); profile with a single worker.
+import os, random, sys, threading, time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_DEFAULT_ENDPOINTS = ("/api/predict", "/api/analyze-reports")
+PROFILE_INTERVAL_SECONDS = 0.005
+PROFILE_MAX_DURATION_SECONDS = 600
+PROFILE_MAX_STACKS = 20000      # distinct stacks kept; further new stacks are counted as "[truncated]"
+# GIL switch interval while a session runs. At the default 5 ms the sampler
+# thread only gets the GIL when a request thread blocks (file or socket I/O),
+# so samples pile up on I/O calls; at 0.2 ms CPU-bound code is sampled fairly.
+PROFILE_SWITCH_INTERVAL = 0.0002
+
+
+def worker_count():
+    """Worker processes serving the app (gunicorn.conf.py and uvicorn both use WEB_CONCURRENCY)."""
+    return int(os.environ.get("WEB_CONCURRENCY") or 1)
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self.active = False
+        self._lock = threading.Lock()
+        self._tracked = {}        # thread id -> endpoint, for sampled requests in progress
+        self._roots = set()       # code objects where a request's stack starts (walks stop there)
+        self._stacks = Counter()
+        self._session = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    # ---------------- control (admin endpoints) ----------------
+    def start(self, sample_rate=0.1, endpoints=PROFILE_DEFAULT_ENDPOINTS, interval=PROFILE_INTERVAL_SECONDS,
+              duration=60):
+        """Start a new session, discarding the previous session's samples."""
+        if isinstance(endpoints, str):
+            endpoints = endpoints.split(",")
+        endpoints = [e.strip() for e in endpoints if isinstance(e, str) and e.strip()]
+        if not endpoints:
+            raise ValueError("endpoints must name at least one route, e.g. /api/predict")
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        if not 0.001 <= interval <= 1:
+            raise ValueError("interval must be between 0.001 and 1 second")
+        if not 0 < duration <= PROFILE_MAX_DURATION_SECONDS:
+            raise ValueError(f"duration must be between 1 and {PROFILE_MAX_DURATION_SECONDS} seconds")
+        self.stop()
+        with self._lock:
+            self._stacks = Counter()
+            self._session = {"sample_rate": sample_rate, "endpoints": sorted(set(endpoints)), "interval": interval,
+                             "duration": duration, "started_at": datetime.utcnow().isoformat(), "stopped_at": None,
+                             "requests_sampled": 0, "samples": 0}
+            self._deadline = time.monotonic() + duration
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self.active = True
+            self._thread.start()
+        return self.status()
+
+    def stop(self):
+        thread = self._thread
+        self._stop.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        return self.status()
+
+    def status(self):
+        with self._lock:
+            session = dict(self._session) if self._session else None
+        return {"active": self.active, "session": session}
+
+    def collapsed(self):
+        """The session's samples in collapsed-stack format, hottest first."""
+        with self._lock:
+            stacks = self._stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    # ---------------- request side ----------------
+    def should_sample(self, endpoint):
+        session = self._session
+        return (self.active and endpoint in session["endpoints"]
+                and random.random() < session["sample_rate"])
+
+    @contextmanager
+    def track(self, endpoint):
+        """Mark the current thread as serving a sampled request to `endpoint`."""
+        tid = threading.get_ident()
+        with self._lock:
+            self._tracked[tid] = endpoint
+            if self._session:
+                self._session["requests_sampled"] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._tracked.pop(tid, None)
+
+    def traced(self, endpoint, fn):
+        """fn wrapped to run under track(endpoint), for request work handed to
+        an executor thread (asgi.py)."""
+        def run(*args):
+            with self.track(endpoint):
+                return fn(*args)
+        self._roots.add(run.__code__)
+        return run
+
+    def add_root(self, fn):
+        """Stacks are cut at the frame running fn (e.g. the dispatch wrapper),
+        so server and framework frames below it are left out."""
+        self._roots.add(fn.__code__)
+        return fn
+
+    # ---------------- sampler thread ----------------
+    def _run(self):
+        interval = self._session["interval"]
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(switch_interval, PROFILE_SWITCH_INTERVAL))
+        try:
+            while not self._stop.wait(interval):
+                if time.monotonic() >= self._deadline:
+                    break
+                self._sample()
+        finally:
+            sys.setswitchinterval(switch_interval)
+            with self._lock:
+                self.active = False
+                if self._session:
+                    self._session["stopped_at"] = datetime.utcnow().isoformat()
+
+    def _sample(self):
+        with self._lock:
+            tracked = dict(self._tracked)
+        if not tracked:
+            return
+        frames = sys._current_frames()
+        stacks = []
+        for tid, endpoint in tracked.items():
+            frame = frames.get(tid)
+            if frame is not None:
+                stacks.append(self._collapse(endpoint, frame))
+        with self._lock:
+            for stack in stacks:
+                if stack not in self._stacks and len(self._stacks) >= PROFILE_MAX_STACKS:
+                    stack = f"{stack.split(';', 1)[0]};[truncated]"
+                self._stacks[stack] += 1
+            self._session["samples"] += len(stacks)
+
+    def _collapse(self, endpoint, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            if code in self._roots:
+                break
+            names.append(f"{frame.f_globals.get('__name__', '?')}.{code.co_qualname}")
+            frame = frame.f_back
+        names.append(endpoint)
+        return ";".join(reversed(names))
+
+
+sampler = SamplingProfiler()
+
+
+def init_app(app):
+    """Track sampled Flask requests while a profiling session is active."""
+    from flask.globals import request_ctx
+    dispatch = app.full_dispatch_request
+
+    @sampler.add_root
+    def full_dispatch_request():
+        if not sampler.active:
+            return dispatch()
+        rule = request_ctx.request.url_rule
+        endpoint = rule.rule if rule is not None else "unmatched"
+        if not sampler.should_sample(endpoint):
+            return dispatch()
+        with sampler.track(endpoint):
+            return dispatch()
+
+    app.full_dispatch_request = full_dispatch_request
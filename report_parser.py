@@ -0,0 +1,274 @@
+# report_parser.py
+# Lab report (PDF) text extraction and field parsing, shared by the
+# /api/analyze-reports endpoint and the bulk ingestion CLI (ingest_reports.py).
+import os
+import re as _re
+
+# Test keys understood by parse_lab_text, in the order the frontend lists them
+TEST_KEYS = ["cbc", "blood_sugar", "kidney_function", "dengue_ns1", "malaria_test", "widal", "ecg"]
+
+# Filename fragments -> test key (archived PDFs are named like sample_cbc_HIGH_RISK.pdf)
+FILENAME_ALIASES = {
+    "cbc": "cbc",
+    "blood_sugar": "blood_sugar",
+    "glucose": "blood_sugar",
+    "kidney_function": "kidney_function",
+    "kft": "kidney_function",
+    "dengue": "dengue_ns1",
+    "ns1": "dengue_ns1",
+    "malaria": "malaria_test",
+    "widal": "widal",
+    "ecg": "ecg",
+}
+
+
+def _pdf_reader(stream):
+    # PyPDF2 is imported on first use: it is ~40 ms of startup that only
+    # report uploads need (app.warm_up imports it ahead of time)
+    from PyPDF2 import PdfReader
+    return PdfReader(stream)
+
+
+def test_key_from_filename(filename):
+    """Infer the test key from a report filename, or None if nothing matches."""
+    name = os.path.basename(filename or "").lower().replace("-", "_").replace(" ", "_")
+    for fragment, key in FILENAME_ALIASES.items():
+        if fragment in name:
+            return key
+    return None
+
+
+# Keyword signatures per test key: (regex, weight). Weight 3 marks terms that
+# name the test itself, weight 1 marks analytes that can show up on other reports
+# too (e.g. "hemoglobin" inside HbA1c on a glucose report).
+REPORT_SIGNATURES = {
+    "cbc": [
+        (r"complete blood count", 3), (r"\bcbc\b", 3), (r"platelets?", 1),
+        (r"\bwbc\b|white blood cell", 1), (r"hemoglobin|\bhgb\b", 1), (r"hematocrit", 1),
+    ],
+    "blood_sugar": [
+        (r"blood (?:sugar|glucose)", 3), (r"\bfbs\b|fasting (?:blood|plasma|glucose)", 3),
+        (r"post.?prandial", 3), (r"hba1c", 1), (r"glucose", 1),
+    ],
+    "kidney_function": [
+        (r"kidney function|renal function|\bkft\b", 3), (r"creatinine", 3),
+        (r"\begfr\b|estimated gfr", 3), (r"\bbun\b|blood urea", 1),
+    ],
+    "dengue_ns1": [
+        (r"\bns1\b", 3), (r"dengue", 3), (r"\big[mg]\b", 1),
+    ],
+    "malaria_test": [
+        (r"malaria", 3), (r"plasmodium|falciparum|vivax", 3), (r"blood smear", 1), (r"parasit", 1),
+    ],
+    "widal": [
+        (r"widal", 3), (r"typhoid|typhi", 1), (r"\b(?:o|h) antigen", 1), (r"1\s*:\s*(?:40|80|160|320)\b", 1),
+    ],
+    "ecg": [
+        (r"\becg\b|\bekg\b|electrocardiogram", 3), (r"\bqrs\b", 1), (r"sinus rhythm", 1),
+        (r"pr interval|qt interval", 1),
+    ],
+}
+
+def _compile_signatures(signatures):
+    """Compile all signatures into one alternation so a document is scanned once.
+    Returns (regex, {outer group number -> (test key, weight)})."""
+    parts, group_map, group = [], {}, 1
+    for key, sigs in signatures.items():
+        for pat, weight in sigs:
+            parts.append(f"({pat})")
+            group_map[group] = (key, weight)
+            group += 1 + _re.compile(pat).groups
+    return _re.compile("|".join(parts), _re.IGNORECASE), group_map
+
+_SIGNATURE_RE, _SIGNATURE_GROUPS = _compile_signatures(REPORT_SIGNATURES)
+
+# Minimum score (one test-naming term, or three analytes) before a type is reported
+MIN_CLASSIFY_SCORE = 3
+
+
+class ReportClassifier:
+    """Incremental report-type classifier. Feed text page by page with `feed`
+    while it is being extracted; each signature counts once per document."""
+
+    def __init__(self):
+        self.matched = set()
+
+    def feed(self, text):
+        if not text:
+            return
+        for m in _SIGNATURE_RE.finditer(text):
+            self.matched.add(m.lastindex)
+
+    def scores(self):
+        scores = {}
+        for group in self.matched:
+            key, weight = _SIGNATURE_GROUPS[group]
+            scores[key] = scores.get(key, 0) + weight
+        return scores
+
+    def result(self):
+        """Return (test_key or None, confidence 0-1, scores)."""
+        scores = self.scores()
+        if not scores:
+            return None, 0.0, scores
+        key, best = max(scores.items(), key=lambda x: x[1])
+        if best < MIN_CLASSIFY_SCORE:
+            return None, 0.0, scores
+        return key, round(best / float(sum(scores.values())), 2), scores
+
+
+def extract_and_classify(stream):
+    """Extract the text of a PDF and classify it in the same pass over its pages.
+    Returns (full_text, test_key or None, confidence, scores)."""
+    reader = _pdf_reader(stream)
+    clf = ReportClassifier()
+    text_chunks = []
+    for page in reader.pages:
+        try:
+            page_text = page.extract_text() or ""
+        except Exception:
+            page_text = ""
+        clf.feed(page_text)
+        text_chunks.append(page_text)
+    key, confidence, scores = clf.result()
+    return "\n".join(text_chunks), key, confidence, scores
+
+
+def mismatch_warning(expected, detected, confidence):
+    """Structured warning returned when an upload does not look like the report it was sent as."""
+    return {
+        "type": "test_type_mismatch",
+        "expected": expected,
+        "detected": detected,
+        "confidence": confidence,
+        "message": f"Uploaded file for '{expected}' looks like a '{detected}' report.",
+    }
+
+
+def _extract_number(labels, text):
+    """
+    Find the first numeric value appearing near any of the given labels.
+    Returns the matched numeric string or "" if not found.
+    Improved: handles various spacing and line breaks.
+    """
+    if not text:
+        return ""
+    for label in labels:
+        # Try multiple pattern variations to handle different PDF layouts
+        patterns = [
+            rf"{label}\s*[:\-]?\s*([0-9]+(?:\.[0-9]+)?)",  # label: number
+            rf"{label}[^0-9\-\.]{0,40}([0-9]+(?:\.[0-9]+)?)",  # label followed by up to 40 chars then number
+            rf"{label}[^\n]*?([0-9]+(?:\.[0-9]+)?)",  # label, then any chars until number on same/next line
+        ]
+        for pattern in patterns:
+            m = _re.search(pattern, text, flags=_re.IGNORECASE | _re.DOTALL)
+            if m:
+                return m.group(1)
+    return ""
+
+def parse_lab_text(test_key, text):
+    """
+    Improved heuristic parser that looks for common words in the PDF text
+    and extracts lab values. Handles various PDF formatting and spacing issues.
+    """
+    if not isinstance(text, str):
+        text = text.decode("utf-8", errors="ignore") if hasattr(text, "decode") else str(text)
+    lower = text.lower()
+    data = {}
+
+    if test_key == "cbc":
+        # Complete Blood Count
+        data["platelets"]  = _extract_number(["platelet", "plt", "thrombocyte"], lower)
+        data["wbc"]        = _extract_number(["wbc", "white blood cell", "white blood", "leukocyte"], lower)
+        data["hemoglobin"] = _extract_number(["hemoglobin", "hb", "hgb"], lower)
+
+    elif test_key == "blood_sugar":
+        # Blood Glucose Test
+        data["fasting"] = _extract_number(["fasting blood", "fbs", "fasting glucose", "fasting plasma"], lower)
+        data["pp"]      = _extract_number(["pp", "post prandial", "postprandial", "post-prandial", "2 hours"], lower)
+
+    elif test_key == "kidney_function":
+        # Kidney Function Test
+        data["creatinine"] = _extract_number(["creatinine", "serum creatinine"], lower)
+        data["egfr"]       = _extract_number(["egfr", "gfr", "estimated gfr"], lower)
+
+    elif test_key == "dengue_ns1":
+        # Dengue NS1 Antigen - look for positive/negative across multiple patterns
+        patterns_pos = [
+            r"ns1[^\n]{0,50}(positive|reactive|detected)",
+            r"dengue[^\n]{0,50}(positive|reactive|detected)",
+            r"antigen[^\n]{0,50}(positive|reactive|detected)",
+        ]
+        patterns_neg = [
+            r"ns1[^\n]{0,50}(negative|non.?reactive|not detected)",
+            r"dengue[^\n]{0,50}(negative|non.?reactive|not detected)",
+            r"antigen[^\n]{0,50}(negative|non.?reactive|not detected)",
+        ]
+        
+        is_positive = any(_re.search(p, lower, _re.IGNORECASE) for p in patterns_pos)
+        is_negative = any(_re.search(p, lower, _re.IGNORECASE) for p in patterns_neg)
+        
+        if is_positive:
+            data["ns1"] = "positive"
+        elif is_negative:
+            data["ns1"] = "negative"
+        else:
+            data["ns1"] = ""
+
+    elif test_key == "malaria_test":
+        # Malaria Test - look for multiple patterns
+        patterns_pos = [
+            r"(malaria|plasmodium)[^\n]{0,50}(positive|detected|present)",
+            r"blood\s*smear[^\n]{0,50}(positive|detected)",
+        ]
+        patterns_neg = [
+            r"(malaria|plasmodium)[^\n]{0,50}(negative|not detected|absent)",
+            r"blood\s*smear[^\n]{0,50}(negative|not detected)",
+        ]
+        
+        is_positive = any(_re.search(p, lower, _re.IGNORECASE) for p in patterns_pos)
+        is_negative = any(_re.search(p, lower, _re.IGNORECASE) for p in patterns_neg)
+        
+        if is_positive:
+            data["parasite"] = "positive"
+        elif is_negative:
+            data["parasite"] = "negative"
+        else:
+            data["parasite"] = ""
+
+    elif test_key == "widal":
+        # Widal Test - look for titers like 1:80, 1:160, 1:320
+        patterns = [
+            r"1\s*:\s*(40|80|160|320)",
+            r"(40|80|160|320)(?=\s*$|\s*\n|\s*;)",  # titer alone on a line
+        ]
+        for pattern in patterns:
+            m = _re.search(pattern, lower)
+            if m:
+                data["titer"] = m.group(0).replace(" ", "")
+                break
+        if "titer" not in data:
+            data["titer"] = ""
+
+    elif test_key == "ecg":
+        # ECG interpretation
+        patterns_abnormal = [
+            r"ecg[^\n]{0,50}(abnormal|ischemia|infarct|st.?t\s*changes|arrhythmia)",
+            r"(abnormal|ischemia|infarct|arrhythmia).*ecg",
+        ]
+        patterns_normal = [
+            r"ecg[^\n]{0,50}(normal|no acute)",
+            r"normal.*ecg",
+        ]
+        
+        is_abnormal = any(_re.search(p, lower, _re.IGNORECASE) for p in patterns_abnormal)
+        is_normal = any(_re.search(p, lower, _re.IGNORECASE) for p in patterns_normal)
+        
+        if is_abnormal:
+            data["abnormal"] = "abnormal"
+        elif is_normal:
+            data["abnormal"] = "normal"
+        else:
+            data["abnormal"] = ""
+
+    return data
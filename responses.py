@@ -0,0 +1,98 @@
+# responses.py
+# How API responses are encoded, in one place for every endpoint:
+#
+#  * JSON: the app's JSON provider (so jsonify and app.json.response) uses
+#    orjson when it is installed, otherwise the standard json module. The
+#    output is the same JSON either way: compact, keys sorted, datetimes as
+#    HTTP dates. The only difference is that orjson writes non-ASCII
+#    characters as UTF-8 instead of \u escapes.
+#  * Compression: compress_response (an after_request hook, also used by
+#    asgi.py) gzips, or brotli-compresses when the `brotli` package is
+#    installed, text and JSON bodies of at least COMPRESS_MIN_BYTES for clients
+#    that accept it. Streamed and file responses (exports, event streams,
+#    PDFs) and bodies that are already encoded are left alone.
+import gzip, os
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # standard json module
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", "4"))     # dynamic bodies; static assets use 9
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", "5"))
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/javascript", "image/svg+xml")
+
+CODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider with orjson doing the encoding when available."""
+    compact = True   # no pretty-printing in debug mode, so output does not depend on APP_DEBUG
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._orjson(obj).decode("utf-8")
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._orjson(obj) + b"\n", mimetype=self.mimetype)
+
+    def _orjson(self, obj):
+        return orjson.dumps(obj, default=self.default,
+                            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+def negotiate(accept_encodings, available=CODINGS):
+    """The preferred content-coding in `available` that the client accepts
+    (a werkzeug Accept, e.g. request.accept_encodings), else "identity"."""
+    for coding in available:
+        if accept_encodings[coding] > 0:
+            return coding
+    return "identity"
+
+
+def encode(data, coding, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY):
+    if coding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    if coding == "gzip":
+        return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+    return data
+
+
+def _compressible(response):
+    mimetype = response.mimetype or ""
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES
+
+
+def compress_response(response, accept_encodings=None):
+    """Compress a buffered response body in place for the client's
+    Accept-Encoding (default: the current request's)."""
+    if (response.direct_passthrough or response.is_streamed or "Content-Encoding" in response.headers
+            or response.status_code < 200 or response.status_code in (204, 206, 304) or not _compressible(response)):
+        return response
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+    coding = negotiate(request.accept_encodings if accept_encodings is None else accept_encodings)
+    if coding != "identity":
+        response.set_data(encode(data, coding))
+        response.headers["Content-Encoding"] = coding
+    return response
+
+
+def init_app(app):
+    app.json = FastJSONProvider(app)
+    app.after_request(compress_response)
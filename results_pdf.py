@@ -0,0 +1,189 @@
+# results_pdf.py
+# Server-side PDF of one user's saved results (admin "Download PDF").
+#
+# The document is built with reportlab platypus from a lazy story: the user's
+# records are read out of results.json (storage.iter_results), sorted by patient
+# ID like the admin results table, and turned into one small table per
+# RECORDS_PER_TABLE rows only as the page builder asks for them, so only a few
+# tables' worth of flowables exist at any time however long the history is. The PDF is written to PDF_CACHE_DIR and sent from there in chunks;
+# the file name includes the user's record count and latest-record fingerprint
+# from user_index, so a cached PDF is reused until the user saves a new result.
+import hashlib, os, tempfile
+from datetime import datetime
+from functools import lru_cache
+from html import escape
+
+import user_index
+from storage import iter_results, on_user_deleted
+
+PDF_CACHE_DIR = os.path.abspath(os.environ.get("PDF_CACHE_DIR", "pdf_cache"))
+PDF_CACHE_MAX_FILES = int(os.environ.get("PDF_CACHE_MAX_FILES", "200"))
+RECORDS_PER_TABLE = 40
+PDF_LAYOUT = 2   # part of the cache file name: bump when the document changes
+
+COLUMNS = ("Date & Time", "Patient ID", "Patient", "Age", "Gender", "Disease", "Risk")
+COL_WIDTHS_INCH = (1.35, 0.75, 1.3, 0.45, 0.65, 1.5, 0.7)
+
+
+# reportlab is imported on first render rather than with the app: it is the
+# largest import in the server (~100 ms) and only this admin download uses it
+# (app.warm_up imports it ahead of time).
+@lru_cache(maxsize=None)
+def _table_style():
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#1f4e79")),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor("#f2f2f2")]),
+    ])
+
+
+class _LazyStory(list):
+    """Flowable list for DocTemplate.build that pulls from an iterator as the
+    builder consumes it. build() only looks at the front of the list (len,
+    [0], del [0], inserts at 0), so keeping `lookahead` items buffered is
+    enough for keepWithNext handling."""
+
+    def __init__(self, flowables, lookahead=4):
+        super().__init__()
+        self._source = iter(flowables)
+        self._lookahead = lookahead
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self._lookahead:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, i):
+        self._fill()
+        return list.__getitem__(self, i)
+
+
+def _text(value):
+    return str(value) if value not in (None, "") else "-"
+
+
+def _story(email, records):
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer
+
+    styles = getSampleStyleSheet()
+    cell = styles['BodyText'].clone('cell', fontSize=8, leading=10)
+    yield Paragraph(f"User History for {escape(email)}", styles['Heading1'])
+    yield Paragraph("Exported: " + datetime.now().strftime("%d/%m/%Y %H:%M"), styles['Normal'])
+    yield Spacer(1, 0.2*inch)
+
+    rows, count = [], 0
+    for record in records:
+        # Paragraph (wrapping) only for the free-text columns; it is the costly cell type
+        rows.append([_text(record.get("timestamp")), _text(record.get("patient_id")),
+                     Paragraph(escape(_text(record.get("patient_name"))), cell),
+                     _text(record.get("patient_age")), _text(record.get("patient_gender")),
+                     Paragraph(escape(_text(record.get("disease"))), cell), _text(record.get("risk"))])
+        count += 1
+        if len(rows) == RECORDS_PER_TABLE:
+            yield _table(rows)
+            rows = []
+    if rows:
+        yield _table(rows)
+    if not count:
+        yield Paragraph("No saved results for this user.", styles['Normal'])
+    else:
+        yield Spacer(1, 0.15*inch)
+        yield Paragraph(f"Total records: {count}", styles['Normal'])
+
+
+def _table(rows):
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Table
+
+    t = Table([list(COLUMNS)] + rows, colWidths=[w * inch for w in COL_WIDTHS_INCH], repeatRows=1)
+    t.setStyle(_table_style())
+    return t
+
+
+def render(email, records, path):
+    """Write the PDF for `records` (any iterable of result dicts) to path."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate
+
+    doc = SimpleDocTemplate(path, pagesize=A4, title=f"User History - {email}",
+                            leftMargin=0.5*inch, rightMargin=0.5*inch)
+    doc.build(_LazyStory(_story(email, records)))
+
+
+def _prune():
+    try:
+        files = [e for e in os.scandir(PDF_CACHE_DIR) if e.name.endswith(".pdf")]
+    except OSError:
+        return
+    files.sort(key=lambda e: e.stat().st_mtime)
+    for entry in files[:max(0, len(files) - PDF_CACHE_MAX_FILES)]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def _user_key(email):
+    return hashlib.sha1(email.encode("utf-8")).hexdigest()[:16]
+
+
+def _remove_user_files(user_key, keep=None):
+    try:
+        names = os.listdir(PDF_CACHE_DIR)
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(PDF_CACHE_DIR, name)
+        if name.startswith(user_key + "-") and name.endswith(".pdf") and path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+@on_user_deleted
+def _user_deleted(email, removed, store, results_before):
+    _remove_user_files(_user_key(email))
+
+
+def _patient_id_number(record):
+    return int(''.join(filter(str.isdigit, record.get("patient_id") or "")) or 0)
+
+
+def user_results_pdf(email):
+    """Path to an up-to-date PDF of the user's results, rendering it on a cache miss."""
+    stats = user_index.load()["users"].get(email) or {}
+    user_key = _user_key(email)
+    path = os.path.join(PDF_CACHE_DIR, f"{user_key}-{stats.get('records', 0)}-{stats.get('latest') or 'none'}-v{PDF_LAYOUT}.pdf")
+    if os.path.exists(path):
+        os.utime(path)  # keep recently used files when pruning
+        return path
+
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=PDF_CACHE_DIR, suffix=".tmp")
+    os.close(fd)
+    try:
+        records = [record for owner, record in iter_results() if owner == email]
+        records.sort(key=_patient_id_number)
+        render(email, records, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    _remove_user_files(user_key, keep=path)  # older versions are no longer reachable
+    _prune()
+    return path
@@ -0,0 +1,63 @@
+# session_tokens.py
+# Stateless signed session tokens (HMAC-SHA256).
+#
+# A token is base64url(JSON claims) + "." + base64url(HMAC-SHA256(secret, claims)).
+# Claims are {"sub": email, "role": "user" | "admin", "exp": unix seconds}.
+# Verifying one is a single HMAC plus hmac.compare_digest; no users.json read
+# and no server-side session table, so every worker can verify any token as
+# long as they share SESSION_SECRET.
+#
+# Set SESSION_SECRET in production. Without it a random secret is generated at
+# startup, so tokens stop working after a restart and are not shared between
+# worker processes.
+import base64, hashlib, hmac, json, os, secrets, time
+
+SESSION_SECRET = os.environ.get("SESSION_SECRET", "")
+SESSION_TTL_SECONDS = int(os.environ.get("SESSION_TTL_SECONDS", str(12 * 3600)))
+ADMIN_SESSION_TTL_SECONDS = int(os.environ.get("ADMIN_SESSION_TTL_SECONDS", str(3600)))
+
+if not SESSION_SECRET:
+    print("SESSION_SECRET is not set; using a random per-process secret (sessions end on restart).")
+    SESSION_SECRET = secrets.token_hex(32)
+
+_KEY = SESSION_SECRET.encode("utf-8")
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload):
+    return hmac.new(_KEY, payload.encode("ascii"), hashlib.sha256).digest()
+
+
+def issue_token(subject, role="user", ttl_seconds=None):
+    """Signed token for `subject` (an email) with the given role."""
+    if ttl_seconds is None:
+        ttl_seconds = ADMIN_SESSION_TTL_SECONDS if role == "admin" else SESSION_TTL_SECONDS
+    claims = {"sub": subject, "role": role, "exp": int(time.time()) + int(ttl_seconds)}
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    return f"{payload}.{_b64encode(_sign(payload))}"
+
+
+def verify_token(token, role=None):
+    """The token's claims if the signature is valid, it has not expired and
+    (when given) its role matches; otherwise None."""
+    if not token or not isinstance(token, str) or token.count(".") != 1:
+        return None
+    payload, signature = token.split(".")
+    try:
+        if not hmac.compare_digest(_sign(payload), _b64decode(signature)):
+            return None
+        claims = json.loads(_b64decode(payload))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(claims, dict) or not isinstance(claims.get("exp"), int) or claims["exp"] < time.time():
+        return None
+    if role is not None and claims.get("role") != role:
+        return None
+    return claims
@@ -0,0 +1,147 @@
+# smtp_pool.py
+# Small pool of authenticated SMTP sessions for send_mail.
+#
+# A fresh connection costs TCP connect + EHLO + STARTTLS + LOGIN (+ QUIT); under
+# OTP bursts that handshake dominates. The pool keeps logged-in sessions open,
+# checks sessions that sat idle with NOOP before reuse, replaces dead ones, and
+# remembers which transport (e.g. TLS:587 or SSL:465) last worked so it is tried
+# first next time.
+import os, smtplib, threading, time
+
+SMTP_POOL_SIZE = int(os.environ.get("SMTP_POOL_SIZE", "2"))                      # idle sessions kept per transport
+SMTP_POOL_IDLE_SECONDS = float(os.environ.get("SMTP_POOL_IDLE_SECONDS", "120"))  # close sessions idle longer than this
+SMTP_POOL_NOOP_AFTER = float(os.environ.get("SMTP_POOL_NOOP_AFTER", "5"))        # NOOP-check sessions idle longer than this
+SMTP_POOL_MAX_MESSAGES = int(os.environ.get("SMTP_POOL_MAX_MESSAGES", "100"))    # messages per session before reconnecting
+
+# Errors about the message itself: the session is still fine and another
+# transport would refuse it too.
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+class _Session:
+    __slots__ = ("server", "transport", "sent", "last_used")
+
+    def __init__(self, server, transport):
+        self.server = server
+        self.transport = transport
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+def _close(session):
+    try:
+        session.server.quit()
+    except Exception:
+        try:
+            session.server.close()
+        except Exception:
+            pass
+
+
+class SMTPPool:
+    """`transports` is a list of (name, connect_fn) in default preference order;
+    connect_fn() must return a connected, logged-in smtplib.SMTP object."""
+
+    def __init__(self, transports, size=SMTP_POOL_SIZE, idle_seconds=SMTP_POOL_IDLE_SECONDS,
+                 noop_after=SMTP_POOL_NOOP_AFTER, max_messages=SMTP_POOL_MAX_MESSAGES):
+        self.transports = list(transports)
+        self.size = size
+        self.idle_seconds = idle_seconds
+        self.noop_after = noop_after
+        self.max_messages = max_messages
+        self.preferred = None          # name of the transport that last delivered
+        self._idle = {name: [] for name, _ in self.transports}
+        self._lock = threading.Lock()
+        self._stats = {"connects": 0, "reused": 0, "noop_failed": 0, "sent": 0}
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, preferred=self.preferred,
+                        idle=sum(len(v) for v in self._idle.values()))
+
+    def _ordered_transports(self):
+        return sorted(self.transports, key=lambda t: t[0] != self.preferred)
+
+    def _acquire(self, name):
+        """An idle, healthy session for this transport, or None."""
+        while True:
+            with self._lock:
+                if not self._idle[name]:
+                    return None
+                session = self._idle[name].pop()  # most recently used first
+            idle_for = time.monotonic() - session.last_used
+            if idle_for > self.idle_seconds:
+                _close(session)
+                continue
+            if idle_for > self.noop_after:
+                try:
+                    code, _ = session.server.noop()
+                except Exception:
+                    code = None
+                if code != 250:
+                    with self._lock:
+                        self._stats["noop_failed"] += 1
+                    _close(session)
+                    continue
+            with self._lock:
+                self._stats["reused"] += 1
+            return session
+
+    def _release(self, session):
+        session.last_used = time.monotonic()
+        if session.sent >= self.max_messages:
+            _close(session)
+            return
+        with self._lock:
+            idle = self._idle[session.transport]
+            if len(idle) < self.size:
+                idle.append(session)
+                return
+        _close(session)
+
+    def _connect(self, name, connect):
+        session = _Session(connect(), name)
+        with self._lock:
+            self._stats["connects"] += 1
+        return session
+
+    def send(self, msg):
+        """Send an EmailMessage over a pooled session; returns the transport name used.
+        Tries the last successful transport first, falling back to the others."""
+        errors = []
+        for name, connect in self._ordered_transports():
+            session = self._acquire(name)
+            for fresh in ((False, True) if session else (True,)):
+                try:
+                    if fresh:
+                        session = self._connect(name, connect)
+                    session.server.send_message(msg)
+                except MESSAGE_ERRORS:
+                    self._release(session)
+                    raise
+                except Exception as e:
+                    if session is not None:
+                        _close(session)
+                        session = None
+                    if fresh:
+                        errors.append((name, e))
+                    continue  # a reused session may just have gone stale: retry on a fresh one
+                session.sent += 1
+                with self._lock:
+                    self._stats["sent"] += 1
+                self.preferred = name
+                self._release(session)
+                return name
+        if len(errors) == 1:
+            raise errors[0][1]
+        if all(isinstance(e, smtplib.SMTPAuthenticationError) for _, e in errors):
+            raise errors[0][1]   # every transport rejected the login: keep it recognisable as permanent
+        raise RuntimeError(" | ".join(f"{name} failed: {type(e).__name__}: {e}" for name, e in errors)) from errors[-1][1]
+
+    def close_all(self):
+        with self._lock:
+            sessions = [s for idle in self._idle.values() for s in idle]
+            for idle in self._idle.values():
+                idle.clear()
+        for session in sessions:
+            _close(session)
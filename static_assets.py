@@ -0,0 +1,121 @@
+# static_assets.py
+# The UI's static files: index.html plus everything under STATIC_DIR (app.js,
+# app.css). Nothing else in the project directory is reachable over HTTP.
+#
+# build() reads every asset once, fingerprints it (content sha256) and keeps it
+# in memory together with gzip (and brotli, if the `brotli` package is
+# installed) encodings made at the highest level. References to /static/<name>
+# in index.html are rewritten to the fingerprinted /static/<stem>.<hash><ext>
+# URL, which is served with a one-year immutable Cache-Control; the page itself
+# and un-fingerprinted names are served with no-cache and are revalidated with
+# their strong ETag (304 when unchanged). With APP_DEBUG the assets are rebuilt
+# whenever a file changes, so front-end edits show up without a restart.
+import hashlib, mimetypes, os, threading
+
+from flask import Response, abort, request
+
+from responses import CODINGS, encode, negotiate
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_FILE = os.path.join(BASE_DIR, "index.html")
+STATIC_DIR = os.path.abspath(os.environ.get("STATIC_DIR", os.path.join(BASE_DIR, "static")))
+STATIC_URL = "/static/"
+MIN_COMPRESS_BYTES = 1024      # smaller files are sent as-is
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+class Asset:
+    __slots__ = ("mimetype", "etag", "cache_control", "encodings")
+
+    def __init__(self, data, mimetype, cache_control):
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(data).hexdigest()[:20]
+        self.cache_control = cache_control
+        self.encodings = {"identity": data}  # content-coding -> body
+        if len(data) >= MIN_COMPRESS_BYTES:
+            for coding in CODINGS:
+                self.encodings[coding] = encode(data, coding, gzip_level=9, brotli_quality=11)
+
+    def with_cache_control(self, cache_control):
+        other = object.__new__(Asset)
+        other.mimetype, other.etag, other.encodings = self.mimetype, self.etag, self.encodings
+        other.cache_control = cache_control
+        return other
+
+
+def _mimetype(name):
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+def _stamps():
+    """(path, mtime_ns, size) of every source file, to detect edits in debug mode."""
+    stamps = []
+    for path in [INDEX_FILE] + _static_files():
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        stamps.append((path, st.st_mtime_ns, st.st_size))
+    return stamps
+
+
+def _static_files():
+    files = []
+    for root, _dirs, names in os.walk(STATIC_DIR):
+        files.extend(os.path.join(root, name) for name in names if not name.startswith("."))
+    return sorted(files)
+
+
+def build():
+    """{url path: Asset} for the page ("/") and every static file."""
+    assets, urls = {}, {}
+    for path in _static_files():
+        name = os.path.relpath(path, STATIC_DIR).replace(os.sep, "/")
+        with open(path, "rb") as f:
+            data = f.read()
+        asset = Asset(data, _mimetype(name), IMMUTABLE)
+        stem, ext = os.path.splitext(name)
+        urls[STATIC_URL + name] = fingerprinted = f"{STATIC_URL}{stem}.{asset.etag[:12]}{ext}"
+        assets[fingerprinted] = asset
+        assets[STATIC_URL + name] = asset.with_cache_control(REVALIDATE)
+
+    with open(INDEX_FILE, encoding="utf-8") as f:
+        page = f.read()
+    for url in urls:
+        page = page.replace(f'"{url}"', f'"{urls[url]}"')
+    assets["/"] = Asset(page.encode("utf-8"), "text/html", REVALIDATE)
+    return assets
+
+
+class StaticAssets:
+    def __init__(self):
+        self._assets = None
+        self._stamps = None
+        self._lock = threading.Lock()
+
+    def load(self, check_files=False):
+        with self._lock:
+            stamps = _stamps() if check_files or self._assets is None else self._stamps
+            if self._assets is None or stamps != self._stamps:
+                self._assets = build()
+                self._stamps = stamps
+            return self._assets
+
+    def response(self, url_path, check_files=False):
+        """Response for one asset, negotiating Content-Encoding and answering
+        conditional requests with 304."""
+        asset = self.load(check_files).get(url_path)
+        if asset is None:
+            abort(404)
+        coding = negotiate(request.accept_encodings, [c for c in CODINGS if c in asset.encodings])
+        etag = asset.etag if coding == "identity" else f"{asset.etag}-{coding}"
+        headers = {"ETag": f'"{etag}"', "Cache-Control": asset.cache_control, "Vary": "Accept-Encoding"}
+        if request.if_none_match.contains_weak(etag):
+            return Response(status=304, headers=headers)
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(asset.encodings[coding], mimetype=asset.mimetype, headers=headers)
+
+
+assets = StaticAssets()
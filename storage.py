@@ -0,0 +1,329 @@
+# storage.py
+# JSON tiny DB shared by the Flask app and the command-line tools.
+import os, json, threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: the lock only covers threads of one process
+    fcntl = None
+
+from metrics import stage
+
+USERS_FILE   = "users.json"
+RESULTS_FILE = "results.json"
+USER_INDEX_FILE = "user_index.json"   # per-user aggregates, see user_index.py
+ANALYTICS_FILE = "analytics.json"     # dashboard counters, see analytics.py
+LOCK_FILE = "json_store.lock"         # flock'ed by `lock`, next to the JSON files
+
+
+class StoreLock:
+    """Lock around read-modify-write of the JSON files, held across threads
+    *and* processes: a threading.Lock for the threads of this process plus an
+    exclusive flock on LOCK_FILE for other gunicorn workers and CLI tools
+    (ingest_reports.py). Not reentrant, like threading.Lock.
+
+    The lock file is opened per process (a descriptor inherited over fork
+    shares its flock with the parent, so it would not exclude anything)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd = None
+        self._pid = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if fcntl is None:
+            return True
+        try:
+            if self._pid != os.getpid():
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                self._pid = os.getpid()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        return True
+
+    def release(self):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    def locked(self):
+        return self._thread_lock.locked()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+lock = StoreLock(LOCK_FILE)
+
+def _read_json(path, default):
+    if not os.path.exists(path):
+        return default
+    try:
+        with stage("json_store_read"), open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return default
+
+def _write_json(path, data):
+    os.replace(_prepare_json(path, data), path)
+
+def _prepare_json(path, data):
+    """Write data next to path; returns the tmp path to os.replace() onto it."""
+    tmp = path + ".tmp"
+    with stage("json_store_write"), open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return tmp
+
+def get_users(): return _read_json(USERS_FILE, {})
+def save_users(x): _write_json(USERS_FILE, x)
+def get_results_store(): return _read_json(RESULTS_FILE, {})
+def save_results_store(x): _write_json(RESULTS_FILE, x)
+
+# ---------------- Deleting a user ----------------
+_delete_hooks = []
+
+def on_user_deleted(fn):
+    """Register fn(email, removed_records, store, results_before) to clean up
+    data derived from a user's results. Hooks run inside delete_user with
+    `lock` held, after the files were replaced; `store` is the new results
+    store and results_before the file_stamp of results.json before the delete."""
+    _delete_hooks.append(fn)
+    return fn
+
+def delete_user(email):
+    """Remove a user, their results and their patient-ID counter as one
+    transaction under `lock`: both files are fully written to tmp files before
+    either is replaced, so a failure leaves the store unchanged. Returns
+    (user_existed, removed_records)."""
+    with lock:
+        users = get_users()
+        store = get_results_store()
+        existed = email in users
+        removed = store.pop(email, None)
+        removed = removed if isinstance(removed, list) else []
+        counter = store.pop(f"_patient_id_counter_{email}", None)
+        if not existed and not removed and counter is None:
+            return False, []
+        users.pop(email, None)
+
+        results_before = file_stamp(RESULTS_FILE)
+        pending = []
+        try:
+            pending.append((_prepare_json(RESULTS_FILE, store), RESULTS_FILE))
+            pending.append((_prepare_json(USERS_FILE, users), USERS_FILE))
+        except Exception:
+            for tmp, _ in pending:
+                os.remove(tmp)
+            raise
+        # results first: a user without results is valid, results without a user are orphans
+        for tmp, path in pending:
+            os.replace(tmp, path)
+
+        for hook in _delete_hooks:
+            try:
+                hook(email, removed, store, results_before)
+            except Exception as e:
+                print(f"delete_user cleanup {getattr(hook, '__name__', hook)} failed for {email}: {e}")
+    return existed, removed
+
+def file_stamp(path):
+    """(mtime_ns, size) of a file, or None if it does not exist; changes on every rewrite."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+# Saved timestamps come from the browser's toLocaleString(), e.g.
+# "13/11/2025, 06:40:58" or "7/12/2025, 7:15:18 pm"; newer ones may be ISO.
+_TIMESTAMP_FORMATS = ("%d/%m/%Y, %H:%M:%S", "%d/%m/%Y, %I:%M:%S %p", "%d/%m/%Y")
+
+def record_time(record):
+    """Parsed timestamp of a saved result, or None if it is missing or unrecognised."""
+    ts = str(record.get("timestamp") or "").strip()
+    if not ts:
+        return None
+    try:
+        return datetime.fromisoformat(ts.replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        pass
+    for fmt in _TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(ts.upper(), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+# ---------------- Reading results.json as a stream ----------------
+def iter_store_records(store):
+    """(email, record) for every saved result in an in-memory results store."""
+    for email, records in store.items():
+        if isinstance(records, list):  # skip _patient_id_counter_* entries
+            for record in records:
+                yield email, record
+
+class _JSONStream:
+    """Incremental reader over one JSON document, refilled in chunks."""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk  # drop what was already consumed
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character (not consumed), or "" at end of input."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} at offset {self.pos} of the current chunk")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # a number or literal ending exactly at the buffer end may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+def iter_results(path=RESULTS_FILE, chunk_size=1 << 16):
+    """(email, record) for every saved result in results.json, parsed one record
+    at a time so memory stays bounded by the largest single record."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        stream = _JSONStream(f, chunk_size)
+        if stream.peek() == "":
+            return
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            email = stream.value()
+            stream.expect(":")
+            if stream.peek() == "[":
+                stream.expect("[")
+                if stream.peek() == "]":
+                    stream.pos += 1
+                else:
+                    while True:
+                        yield email, stream.value()
+                        if stream.peek() == "]":
+                            stream.pos += 1
+                            break
+                        stream.expect(",")
+            else:
+                stream.value()  # _patient_id_counter_* entries
+            if stream.peek() == "}":
+                return
+            stream.expect(",")
+
+
+# ---------------- Files derived from results.json ----------------
+class DerivedIndex:
+    """A JSON file computed from results.json, stamped with the results.json
+    version (file_stamp) it reflects. Writers apply each new record and save;
+    readers get a cached copy, rebuilt in one pass whenever results.json was
+    changed by something that did not update the index (e.g. ingest_reports.py).
+
+    The cached dict is never changed in place (readers serialize it without the
+    lock): writers go through apply(), which edits a copy and saves it.
+
+    build(records) receives an iterable of (email, record) and returns the
+    index dict; the "results_stamp" key is managed here."""
+
+    def __init__(self, path, build):
+        self.path = path
+        self.build = build
+        self._cache = (None, None)   # (stamp of self.path, index)
+        self._cache_lock = threading.Lock()
+
+    def rebuild(self, store=None):
+        stamp = file_stamp(RESULTS_FILE)  # taken first: a write during the read leaves it stale, not wrong
+        index = self.build(iter_store_records(store) if store is not None else iter_results())
+        index["results_stamp"] = stamp
+        return index
+
+    def save(self, index, stamp_results=True):
+        if stamp_results:
+            index["results_stamp"] = file_stamp(RESULTS_FILE)
+        _write_json(self.path, index)
+        with self._cache_lock:
+            self._cache = (file_stamp(self.path), index)
+
+    def _current(self):
+        """The index as last saved (cached per file version), without checking staleness."""
+        stamp = file_stamp(self.path)
+        with self._cache_lock:
+            cached_stamp, index = self._cache
+        if index is None or stamp != cached_stamp:
+            index = _read_json(self.path, None)
+            with self._cache_lock:
+                self._cache = (stamp, index)
+        return index
+
+    def apply(self, index, fn):
+        """With `lock` held: fn(copy of index), then save the copy."""
+        index = json.loads(json.dumps(index))
+        fn(index)
+        self.save(index)
+
+    def update(self, fn, results_before, store):
+        """With `lock` held, right after results.json was rewritten from `store`:
+        apply fn(index) if the index matched the previous results.json version
+        (results_before), otherwise rebuild it from `store`; then save."""
+        index = self._current()
+        if isinstance(index, dict) and index.get("results_stamp") == results_before:
+            self.apply(index, fn)
+        else:
+            self.save(self.build(iter_store_records(store)))
+
+    def load(self, store=None):
+        """The index, rebuilt when missing or stale. Pass `store` (the results
+        store just read, unmodified) only while holding `lock`; without it the
+        rebuild streams results.json and takes the lock itself."""
+        index = self._current()
+        if not isinstance(index, dict) or index.get("results_stamp") != file_stamp(RESULTS_FILE):
+            if store is not None:
+                index = self.rebuild(store)
+                self.save(index, stamp_results=False)
+            else:
+                with lock:
+                    index = self.rebuild()
+                    self.save(index, stamp_results=False)
+        return index
@@ -0,0 +1,17 @@
+# test_age_specific_recommendations.py
+# Infant month ranges: only 0-12 months get month-specific protocols.
+import age_specific_recommendations as asr
+
+
+def test_month_profile_within_first_year():
+    assert asr.get_age_profile(4 / 12) == (asr.get_age_category(4 / 12), "3-5")
+
+
+def test_out_of_range_months_fall_back_to_age_category():
+    # {"age": 0, "months": 18} reaches the recommender as 1.5 years; -3 months as -0.25
+    for months in (18, 13, -3):
+        age = months / 12
+        assert asr.get_age_profile(age) == (asr.get_age_category(age), None)
+        by_age = asr.knowledge_base.active().age_specific["fever"]
+        expected = by_age.get(asr.get_age_category(age), by_age.get("adult"))
+        assert asr.get_age_specific_recommendations("fever", age) == expected
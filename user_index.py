@@ -0,0 +1,121 @@
+# user_index.py
+# Per-user aggregates and sorted lookups for the admin user list.
+#
+# user_index.json holds {email: {"records", "last_visit", "highest_risk",
+# "latest"}} for every user with saved results ("latest" fingerprints the most
+# recently saved record, e.g. as a cache key), stamped with the results.json version it was
+# built from. save_result applies each new record to it, so /api/admin/users
+# can show per-user stats without scanning results.json. If results.json was
+# written by something else (e.g. ingest_reports.py) the stamp no longer
+# matches and the index is rebuilt in one pass on next use.
+#
+# users.json is parsed once per change (keyed on its mtime/size) into email-,
+# username- and phone-sorted lists, so prefix search is a bisect instead of a scan.
+import hashlib, json, threading
+from bisect import bisect_left
+
+from storage import USERS_FILE, USER_INDEX_FILE, DerivedIndex, file_stamp, get_users, on_user_deleted, record_time
+
+# Higher is worse; anything else (blank, "Unknown") ranks 0
+RISK_RANK = {"low": 1, "moderate": 2, "medium": 2, "high": 3, "critical": 4}
+
+_cache_lock = threading.Lock()
+_users_cache = (None, None)    # (users.json stamp, UsersView)
+
+
+def _empty():
+    return {"records": 0, "last_visit": None, "highest_risk": None, "latest": None}
+
+
+def fingerprint(record):
+    return hashlib.sha1(json.dumps(record, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def _apply(entry, record):
+    entry["records"] += 1
+    entry["latest"] = fingerprint(record)
+    when = record_time(record)
+    if when is not None:
+        visit = when.isoformat()
+        if entry["last_visit"] is None or visit > entry["last_visit"]:
+            entry["last_visit"] = visit
+    risk = (record.get("risk") or "").strip()
+    if RISK_RANK.get(risk.lower(), 0) > RISK_RANK.get((entry["highest_risk"] or "").lower(), 0):
+        entry["highest_risk"] = risk
+
+
+def build(records):
+    """Index from (email, record) pairs in one pass."""
+    users = {}
+    for email, record in records:
+        _apply(users.setdefault(email, _empty()), record)
+    return {"users": users}
+
+
+_index = DerivedIndex(USER_INDEX_FILE, build)
+load = _index.load
+rebuild = _index.rebuild
+
+
+def record_saved(index, email, record):
+    """Apply a record that was just saved to results.json (with storage.lock
+    held; `index` from load() before the save)."""
+    _index.apply(index, lambda index: _apply(index["users"].setdefault(email, _empty()), record))
+
+
+@on_user_deleted
+def _user_deleted(email, removed, store, results_before):
+    _index.update(lambda index: index["users"].pop(email, None), results_before, store)
+
+
+def user_stats(index, email):
+    stats = dict(index["users"].get(email) or _empty())
+    stats.pop("latest", None)
+    return stats
+
+
+# ---------------- users.json views ----------------
+class UsersView:
+    """users.json plus emails, (lowercased username, email) and (phone, email)
+    pairs, all sorted."""
+    __slots__ = ("users", "emails", "usernames", "phones")
+
+    def __init__(self, users):
+        self.users = users
+        self.emails = sorted(users)
+        self.usernames = sorted(((display_name(email, u) or "").lower(), email) for email, u in users.items())
+        self.phones = sorted((str(u.get("phone") or ""), email) for email, u in users.items() if u.get("phone"))
+
+    def search(self, prefix):
+        """Emails whose address, username or phone starts with `prefix`
+        (case-insensitive), sorted."""
+        prefix = prefix.lower()
+        found = set()
+        i = bisect_left(self.emails, prefix)
+        while i < len(self.emails) and self.emails[i].startswith(prefix):
+            found.add(self.emails[i])
+            i += 1
+        for pairs in (self.usernames, self.phones):
+            i = bisect_left(pairs, (prefix, ""))
+            while i < len(pairs) and pairs[i][0].startswith(prefix):
+                found.add(pairs[i][1])
+                i += 1
+        return sorted(found)
+
+
+def display_name(email, user):
+    return user.get("username") or user.get("name") or email
+
+
+def users_view():
+    """UsersView for the current users.json, re-parsed only when the file changes."""
+    global _users_cache
+    stamp = file_stamp(USERS_FILE)
+    with _cache_lock:
+        cached_stamp, view = _users_cache
+    if view is None or stamp != cached_stamp:
+        users = get_users()
+        view = UsersView(users if isinstance(users, dict) else {})
+        with _cache_lock:
+            _users_cache = (stamp, view)
+    return view
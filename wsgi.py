@@ -0,0 +1,6 @@
+# wsgi.py
+# Production entry point:  gunicorn -c gunicorn.conf.py wsgi:app
+# (any WSGI server can import `app` from here).
+from app import create_app
+
+app = create_app()